@@ -1,6 +1,55 @@
 import copy
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class ShipSpec:
+    """
+    Immutable combat statistics of a ship.
+
+    Built from a Ship with Ship.spec() and shared by every trial of a simulation; the
+    per-trial damage state lives in fight_simulation.ArmyState instead of on the ship.
+    """
+    name: str
+    combat: int
+    cost: float
+    move: int
+    hits: int = 1
+    capacity: int = 0
+    sustain_damage: bool = False
+    bombardment: bool = False
+    bombardment_hits: int = 0
+    bombardment_combat: int = 0
+    anti_fighter_barrage: bool = False
+    anti_fighter_hits: int = 0
+    anti_fighter_combat: int = 0
+    is_fighter: bool = False
+    is_space_cannon: bool = False
+    is_flagship: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class UnitGroup:
+    """
+    ``count`` identical units in count-compressed form, e.g. UnitGroup(DefaultFighter().spec(), 200).
+
+    simulate_fight and the army_stat functions accept armies made of groups (mixed with
+    single ships if needed); the other engines expand them into single ships.
+    """
+    spec: ShipSpec
+    count: int
+
+    @classmethod
+    def of(cls, ship, count: int) -> "UnitGroup":
+        return cls(ship.spec() if isinstance(ship, Ship) else ship, count)
+
 
 class Ship:
+    # Unit kinds the precombat phase cares about (set by the Default classes)
+    is_fighter = False
+    is_space_cannon = False
+    is_flagship = False
+
     def __init__(self, name: str, combat: int, cost: float, move: int, hits: int = 1, capacity: int= 0, 
                  sustain_damage: bool = False, 
                  bombardment: bool = False, 
@@ -26,7 +75,12 @@ class Ship:
         self.hit_value += upgrade_factor
         
     def copy(self):
-        return Ship(
+        # Shallow copy keeps the subclass and with it the unit kind flags
+        return copy.copy(self)
+
+    def spec(self) -> ShipSpec:
+        # Freeze the current (possibly upgraded) statistics
+        return ShipSpec(
             name=self.name,
             combat=self.combat,
             cost=self.cost,
@@ -39,7 +93,10 @@ class Ship:
             bombardment_combat=self.bombardment_combat,
             anti_fighter_barrage=self.anti_fighter_barrage,
             anti_fighter_hits=self.anti_fighter_hits,
-            anti_fighter_combat=self.anti_fighter_combat
+            anti_fighter_combat=self.anti_fighter_combat,
+            is_fighter=self.is_fighter,
+            is_space_cannon=self.is_space_cannon,
+            is_flagship=self.is_flagship
         )
 
 class DefaultCruiser(Ship):
@@ -67,6 +124,8 @@ class DefaultDreadnought(Ship):
 
         
 class DefaultFlagship(Ship):
+    is_flagship = True
+
     def __init__(self):
         # Predefined attributes for a flagship
         super().__init__(name="Flagship I", hits=2, combat=5, cost=12, move=1, capacity=3, sustain_damage=True)
@@ -87,6 +146,8 @@ class DefaultCarrier(Ship):
         self.name += "I"  # Naming convention for upgraded ship
 
 class DefaultFighter(Ship):
+    is_fighter = True
+
     def __init__(self):
         super().__init__(
             name="Fighter I",
@@ -135,6 +196,8 @@ class DefaultWarSun(Ship):
         )
 
 class SpaceCannon(Ship):
+    is_space_cannon = True
+
     def __init__(self):
         super().__init__(
             name="Space Cannon I",
@@ -148,3 +211,29 @@ class SpaceCannon(Ship):
         self.name += "I"
 
 
+
+
+# Ground forces: they do not take part in space combat, only in invasions (see invasion.py)
+class DefaultInfantry(Ship):
+    def __init__(self):
+        super().__init__(
+            name="Infantry I",
+            combat=8,
+            cost=0.5,
+            move=0
+        )
+
+    def upgrade(self, upgrade_factor):
+        self.combat -= 1
+        self.name += "I"
+
+
+class DefaultMech(Ship):
+    def __init__(self):
+        super().__init__(
+            name="Mech",
+            combat=6,
+            cost=2,
+            move=0,
+            sustain_damage=True
+        )
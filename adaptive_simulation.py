@@ -0,0 +1,137 @@
+from Ships import *  # assuming Ships module is present with the Default classes
+from statistics import NormalDist
+import time
+import numpy as np
+from fight_simulation import FightResult, spawn_streams
+from vectorized_simulation import vectorized_tallies
+
+# First batch of an adaptive run; later batches double the number of trials so far
+FIRST_BATCH = 1000
+MAX_BATCH = 200000
+# Cumulative trials after each stage of a progressive run, and the largest batch between progress calls
+PROGRESSIVE_STAGES = (1000, 10000, 100000)
+PROGRESSIVE_CHUNK = 10000
+
+
+def wilson_interval(successes: int, n: int, confidence=0.95) -> tuple[float, float]:
+    # Wilson score interval for a binomial proportion
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / n
+    denominator = 1 + z ** 2 / n
+    centre = (p + z ** 2 / (2 * n)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+class AdaptiveFightResult(FightResult):
+    # FightResult that also reports how precise the adaptive run got
+    def __init__(self, armies: list[list[Ship]], precision: float, confidence: float):
+        super().__init__(armies)
+        self.precision = precision
+        self.confidence = confidence
+        self.intervals = {}
+        self.achieved_precision = 1.0
+        self.elapsed = 0.0
+        self.cancelled = False
+
+    def format(self) -> str:
+        interval_lines = "\n".join(
+            f"    {label} Wins {self.confidence:.0%} Interval: [{low:.4f}, {high:.4f}]"
+            for label, (low, high) in self.intervals.items()
+        )
+        status = " (cancelled)" if self.cancelled else ""
+        target = f" (target {self.precision})" if self.precision is not None else ""
+        return super().format() + f"""Trials Used: {self.n_fights}{status}
+{interval_lines}
+    Achieved Precision (widest interval): {self.achieved_precision:.4f}{target}
+    Elapsed Time: {self.elapsed:.2f} s
+    """
+
+    def to_dict(self, top=5) -> dict:
+        data = super().to_dict(top)
+        data.update({
+            "precision": self.precision,
+            "confidence": self.confidence,
+            "intervals": {label: list(interval) for label, interval in self.intervals.items()},
+            "achieved_precision": self.achieved_precision,
+            "elapsed": self.elapsed,
+            "cancelled": self.cancelled,
+        })
+        return data
+
+
+def simulate_fight_adaptive(armies: list[list[Ship]], precision=0.02, max_seconds=None, confidence=0.95,
+                            max_fights=10 ** 7, seed=None, tally_function=vectorized_tallies,
+                            progress=None) -> AdaptiveFightResult:
+    """
+    Simulate in growing batches until the win probabilities are known well enough.
+
+    Stops once the Wilson interval of both armies' win probability is narrower than
+    ``precision`` (full width), when ``max_seconds`` is used up or when ``max_fights``
+    trials have run. Every batch gets its own child of the seed, so a seed reproduces
+    the same batches. The result also reports the number of trials used and the
+    achieved precision.
+
+    ``progress`` is called with the partial result after every batch; returning False
+    from it cancels the run, which then returns what it has with ``cancelled`` set.
+    """
+    start = time.perf_counter()
+    # Every batch gets a fresh child stream of the seed (an int, SeedSequence or Generator)
+    parent = seed if isinstance(seed, (np.random.SeedSequence, np.random.Generator)) else np.random.SeedSequence(seed)
+    result = AdaptiveFightResult(armies, precision, confidence)
+
+    while True:
+        batch = min(max(FIRST_BATCH, result.n_fights), MAX_BATCH, max_fights - result.n_fights)
+        result.merge(tally_function(armies, batch, spawn_streams(parent, 1)[0]))
+
+        _update_intervals(result, start)
+
+        if progress is not None and progress(result) is False:
+            result.cancelled = True
+            return result
+
+        out_of_time = max_seconds is not None and result.elapsed >= max_seconds
+        if result.achieved_precision <= precision or out_of_time or result.n_fights >= max_fights:
+            return result
+
+
+def _update_intervals(result: AdaptiveFightResult, start: float):
+    result.intervals = {label: wilson_interval(result.wins[label], result.n_fights, result.confidence)
+                        for label in ("Army 1", "Army 2")}
+    result.achieved_precision = max(high - low for low, high in result.intervals.values())
+    result.elapsed = time.perf_counter() - start
+
+
+def simulate_fight_progressive(armies: list[list[Ship]], stages=PROGRESSIVE_STAGES, confidence=0.95, seed=None,
+                               tally_function=vectorized_tallies, progress=None) -> AdaptiveFightResult:
+    """
+    Anytime estimate: a rough answer after the first stage, refined by the later ones.
+
+    ``stages`` are cumulative trial counts (by default 1k, 10k, then 100k). Trials run
+    in batches of at most PROGRESSIVE_CHUNK and ``progress`` is called with the partial
+    result after every batch, so a caller can drop a run within one batch by returning
+    False (``cancelled`` is then set). ``result.n_fights in stages`` tells that a stage
+    is complete. precision is None: the run stops after the last stage.
+    """
+    start = time.perf_counter()
+    parent = seed if isinstance(seed, (np.random.SeedSequence, np.random.Generator)) else np.random.SeedSequence(seed)
+    result = AdaptiveFightResult(armies, None, confidence)
+
+    for target in stages:
+        while result.n_fights < target:
+            batch = min(PROGRESSIVE_CHUNK, target - result.n_fights)
+            result.merge(tally_function(armies, batch, spawn_streams(parent, 1)[0]))
+            _update_intervals(result, start)
+            if progress is not None and progress(result) is False:
+                result.cancelled = True
+                return result
+    return result
+
+
+if __name__ == "__main__":
+    army_1 = [DefaultCruiser(), DefaultCruiser()]
+    army_2 = [DefaultCruiser()]
+
+    print(simulate_fight_adaptive([army_1, army_2], precision=0.01))
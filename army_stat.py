@@ -1,61 +1,173 @@
 import numpy as np
-from scipy.stats import binom, norm, truncnorm
+from scipy.stats import norm, truncnorm
 from Ships import *  # assuming Ships module is present with the Default classes
+from fight_simulation import poisson_binomial_pmf, to_groups
+
+# Number of simulations drawn per batch, keeps memory flat for very large num_simulations
+SIMULATION_CHUNK_SIZE = 2 ** 18
+
+
+def _percentiles_from_counts(counts: np.ndarray, percentiles) -> list[float]:
+    # Same result as np.percentile (linear interpolation) on the samples behind a histogram
+    cumulative = np.cumsum(counts)
+    last_index = cumulative[-1] - 1
+
+    def sorted_value(index):
+        return int(np.searchsorted(cumulative, index, side="right"))
+
+    values = []
+    for q in percentiles:
+        position = q / 100 * last_index
+        lower, upper = int(np.floor(position)), int(np.ceil(position))
+        low_value, high_value = sorted_value(lower), sorted_value(upper)
+        values.append(low_value + (high_value - low_value) * (position - lower))
+    return values
+
+
+def _army_totals(groups: list[UnitGroup]) -> tuple:
+    # Cost, health (number of ships + sustain damage ships), lowest movement and total capacity
+    total_cost = sum([group.spec.cost * group.count for group in groups])
+    army_health = sum([group.count * (2 if group.spec.sustain_damage else 1) for group in groups])
+    lowest_movement = min([group.spec.move for group in groups])
+    total_capacity = sum([group.spec.capacity * group.count for group in groups])
+    return total_cost, army_health, lowest_movement, total_capacity
+
+
+def _hit_moments(groups: list[UnitGroup]) -> tuple[float, float]:
+    # Mean and variance of total hits: every die is an independent Bernoulli trial
+    mean = sum([group.count * group.spec.hits * (11 - group.spec.combat) / 10 for group in groups])
+    variance = sum([
+        group.count * group.spec.hits * ((11 - group.spec.combat) / 10) * (1 - (11 - group.spec.combat) / 10)
+        for group in groups
+    ])
+    return mean, variance
+
+
+# The statistics functions take ships, ShipSpecs or UnitGroups; work scales with the
+# number of distinct unit types, not the number of units
 
 # Function to calculate statistics using a Simulation-based approach
-def get_statistics_simulation(army: list[Ship], num_simulations=10000):
-    # Initialize statistics
-    hits = []
-    sustain_damage_ships = 0
-    movement_values = []
-    total_capacity = 0
-    
-    # List to store the simulated total hits for the entire army
-    simulated_hits = []
-    
-    for _ in range(num_simulations):  # Repeat simulation multiple times
-        total_hits_in_simulation = 0
-        
-        for ship in army:
-            p_hit = (11 - ship.combat) / 10  # Probability of success (hit)
-            n_trials = ship.hits  # Number of trials (hits per ship)
-            
-            # Simulate the number of hits for this ship using binomial distribution
-            hits_for_ship = binom.rvs(n_trials, p_hit)
-            total_hits_in_simulation += hits_for_ship
-        
-        # Store the total hits from this simulation
-        simulated_hits.append(total_hits_in_simulation)
+def get_statistics_simulation(army: list[Ship], num_simulations=10000, rng: np.random.Generator = None):
+    if rng is None:
+        rng = np.random.default_rng()
+    groups = to_groups(army)
+
+    # Group ships into (combat, hits) classes; a class is one binomial with count * hits dice
+    classes = {}
+    for group in groups:
+        key = (group.spec.combat, group.spec.hits)
+        classes[key] = classes.get(key, 0) + group.spec.hits * group.count
+    class_dice = np.array(list(classes.values()), dtype=np.int64)
+    class_p_hit = np.clip([(11 - combat) / 10 for combat, _ in classes], 0.0, 1.0)
+
+    # Simulated total hits are only kept as a histogram, so memory does not grow with num_simulations
+    hit_counts = np.zeros(int(class_dice.sum()) + 1, dtype=np.int64)
+    remaining = num_simulations
+    while remaining > 0:
+        chunk = min(remaining, SIMULATION_CHUNK_SIZE)
+        total_hits = rng.binomial(class_dice, class_p_hit, size=(chunk, class_dice.size)).sum(axis=1)
+        hit_counts += np.bincount(total_hits, minlength=hit_counts.size)
+        remaining -= chunk
     
     # Calculate mean and variance of total hits from the simulation
-    mean_total_hits = sum([ship.hits * (11 - ship.combat) / 10 for ship in army])
-    variance_total_hits = sum([
-        ship.hits * ((11 - ship.combat) / 10) * (1 - (11 - ship.combat) / 10)
-        for ship in army
-    ])
+    mean_total_hits, variance_total_hits = _hit_moments(groups)
     std_dev_total_hits = np.sqrt(variance_total_hits)
     
     # Calculate quantiles (1%, 10%, 25%, 50%, 75%, 90%, 99%)
-    quantiles_hits = np.percentile(simulated_hits, [1, 10, 25, 33, 50, 66, 75, 90, 99])
+    quantiles_hits = _percentiles_from_counts(hit_counts, [1, 10, 25, 33, 50, 66, 75, 90, 99])
     
     # Clamp negative quantiles to zero
     quantiles_hits = [max(0, q) for q in quantiles_hits]  # Ensuring no negative quantiles
     
-    # Calculate army health (number of ships + sustain damage ships)
-    sustain_damage_ships = sum([1 for ship in army if ship.sustain_damage])
-    army_health = len(army) + sustain_damage_ships
+    # Army cost, health (number of ships + sustain damage ships), lowest movement and total capacity
+    total_cost, army_health, lowest_movement, total_capacity = _army_totals(groups)
     
-    # Calculate the lowest movement value in the army
-    movement_values = [ship.move for ship in army]
-    lowest_movement = min(movement_values)
+    # Return the statistics as a formatted string
+    statistics = f"""
+    Army Statistics (Simulation-based):
+    ----------------
+    Mean Hits: {mean_total_hits:.2f}
+    Variance of Hits: {variance_total_hits:.2f}
+    Standard Deviation of Hits: {std_dev_total_hits:.2f}
+    1% Quantile of Hits: {quantiles_hits[0]:.2f}
+    10% Quantile of Hits: {quantiles_hits[1]:.2f}
+    25% Quantile of Hits: {quantiles_hits[2]:.2f}
+    33% Quantile of Hits: {quantiles_hits[3]:.2f}
+    50% Quantile of Hits (Median): {quantiles_hits[4]:.2f}
+    66% Quantile of Hits: {quantiles_hits[5]:.2f}
+    75% Quantile of Hits: {quantiles_hits[6]:.2f}
+    90% Quantile of Hits: {quantiles_hits[7]:.2f}
+    99% Quantile of Hits: {quantiles_hits[8]:.2f}
     
-    # Calculate the total capacity
-    total_capacity = sum([ship.capacity for ship in army])
-    total_cost = sum([ship.cost for ship in army])
+    Army Cost: {total_cost}
+    Army Health (Number of Ships + Sustain Damage): {army_health}
+    Army Movement (Lowest Movement Value): {lowest_movement}
+    Army Capacity (Total Capacity of Ships): {total_capacity}
+    """
     
+    return statistics
+
+
+# Function to calculate statistics from the exact distribution of total hits
+QUANTILE_LEVELS = [0.01, 0.10, 0.25, 0.33, 0.50, 0.66, 0.75, 0.90, 0.99]
+
+
+# Numbers behind get_statistics_exact, for callers that need values rather than text
+def exact_hit_statistics(army: list[Ship]) -> dict:
+    # Exact distribution of total hits: one binomial per combat value, convolved together
+    groups = to_groups(army)
+    hits_pmf = poisson_binomial_pmf((group.spec.combat, group.spec.hits * group.count) for group in groups)
+    hits_values = np.arange(hits_pmf.size)
+    hits_cdf = np.cumsum(hits_pmf)
+
+    mean_total_hits = float(np.sum(hits_values * hits_pmf))
+    variance_total_hits = float(np.sum((hits_values - mean_total_hits) ** 2 * hits_pmf))
+
+    # Quantile q is the smallest number of hits whose cumulative probability reaches q
+    # (small tolerance so rounding in the convolution does not push a quantile up by one)
+    quantiles_hits = [int(np.searchsorted(hits_cdf, q - 1e-12)) for q in QUANTILE_LEVELS]
+
+    # tail_probabilities[k] is the probability of scoring at least k hits
+    tail_probabilities = 1 - np.concatenate([[0.0], hits_cdf[:-1]])
+    total_cost, army_health, lowest_movement, total_capacity = _army_totals(groups)
+
+    return {
+        "hits_pmf": hits_pmf.tolist(),
+        "mean": mean_total_hits,
+        "variance": variance_total_hits,
+        "std_dev": float(np.sqrt(variance_total_hits)),
+        "quantiles": dict(zip(QUANTILE_LEVELS, quantiles_hits)),
+        "tail_probabilities": tail_probabilities.tolist(),
+        "cost": total_cost,
+        # Army health is the number of ships + sustain damage ships
+        "health": army_health,
+        "movement": lowest_movement,
+        "capacity": total_capacity,
+    }
+
+
+def get_statistics_exact(army: list[Ship]):
+    stats = exact_hit_statistics(army)
+    mean_total_hits = stats["mean"]
+    variance_total_hits = stats["variance"]
+    std_dev_total_hits = stats["std_dev"]
+    quantiles_hits = list(stats["quantiles"].values())
+
+    # Probability of scoring at least k hits, up to the 99% quantile
+    tail_probabilities = stats["tail_probabilities"]
+    tail_lines = "\n".join(
+        f"    Probability of {k}+ Hits: {tail_probabilities[k] * 100:.2f}%"
+        for k in range(1, max(quantiles_hits[8], 1) + 1) if k < len(tail_probabilities)
+    )
+
+    army_health = stats["health"]
+    lowest_movement = stats["movement"]
+    total_capacity = stats["capacity"]
+    total_cost = stats["cost"]
+
     # Return the statistics as a formatted string
     statistics = f"""
-    Army Statistics (Simulation-based):
+    Army Statistics (Exact Distribution):
     ----------------
     Mean Hits: {mean_total_hits:.2f}
     Variance of Hits: {variance_total_hits:.2f}
@@ -69,6 +181,8 @@ def get_statistics_simulation(army: list[Ship], num_simulations=10000):
     75% Quantile of Hits: {quantiles_hits[6]:.2f}
     90% Quantile of Hits: {quantiles_hits[7]:.2f}
     99% Quantile of Hits: {quantiles_hits[8]:.2f}
+
+{tail_lines}
     
     Army Cost: {total_cost}
     Army Health (Number of Ships + Sustain Damage): {army_health}
@@ -81,15 +195,10 @@ def get_statistics_simulation(army: list[Ship], num_simulations=10000):
 
 # Function to calculate statistics using a Normal Approximation approach
 def get_statistics_normal(army: list[Ship], use_truncated_normal=False):
-    # Initialize statistics
-    hits = []
-    sustain_damage_ships = 0
-    movement_values = []
-    total_capacity = 0
+    groups = to_groups(army)
     
-    # Calculate the mean and variance for the army based on normal approximation
-    total_mean_hits = sum([ship.hits * (11 - ship.combat) / 10 for ship in army])  # Sum of individual means
-    total_variance_hits = sum([ship.hits * (11 - ship.combat) / 10 * (1 - (11 - ship.combat) / 10) for ship in army])  # Sum of individual variances
+    # Calculate the mean and variance for the army based on normal approximation (sums of individual dice)
+    total_mean_hits, total_variance_hits = _hit_moments(groups)
     
     # Calculate standard deviation from the variance
     total_std_dev_hits = np.sqrt(total_variance_hits)
@@ -106,17 +215,8 @@ def get_statistics_normal(army: list[Ship], use_truncated_normal=False):
     # Ensure quantiles don't go below zero if using normal distribution
     quantiles_hits = [max(0, q) for q in quantiles_hits]  # Ensuring no negative quantiles
     
-    # Calculate army health (number of ships + sustain damage ships)
-    sustain_damage_ships = sum([1 for ship in army if ship.sustain_damage])
-    army_health = len(army) + sustain_damage_ships
-    
-    # Calculate the lowest movement value in the army
-    movement_values = [ship.move for ship in army]
-    lowest_movement = min(movement_values)
-    
-    # Calculate the total capacity
-    total_capacity = sum([ship.capacity for ship in army])
-    total_cost = sum([ship.cost for ship in army])
+    # Army cost, health (number of ships + sustain damage ships), lowest movement and total capacity
+    total_cost, army_health, lowest_movement, total_capacity = _army_totals(groups)
 
     # Return the statistics as a formatted string
     statistics = f"""
@@ -149,6 +249,9 @@ if __name__ == "__main__":
     
     # Simulation-based approach
     print(get_statistics_simulation(army))
+
+    # Exact distribution approach
+    print(get_statistics_exact(army))
     
     # Normal approximation approach with truncated normal (no negative hits)
     print(get_statistics_normal(army, use_truncated_normal=True))
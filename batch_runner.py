@@ -0,0 +1,224 @@
+"""
+Headless batch runner: reads fleets and matchups from a scenario file and streams
+one JSON result per line as each matchup finishes.
+
+    python batch_runner.py scenarios.jsonl --engine vectorized --n-fights 20000 -o results.jsonl
+
+Scenario files
+--------------
+JSONL: one object per line, either a fleet definition
+    {"fleet": "cruiser_screen", "ships": ["Cruiser", {"type": "Destroyer", "upgraded": true, "count": 2}]}
+or a matchup (fight when army1/army2 are given, army analysis when only army is given)
+    {"id": "m1", "army1": "cruiser_screen", "army2": ["Dreadnought", "Dreadnought"], "engine": "exact"}
+    {"id": "s1", "army": "cruiser_screen", "method": "exact"}
+
+JSON: {"fleets": {name: ships, ...}, "matchups": [matchup, ...]}
+
+CSV: columns id, army1, army2, army, engine, n_fights, precision, seed, method, where an
+army cell is a fleet name or a compact list such as "2x Cruiser, Dreadnought+, 6x Fighter"
+("+" marks an upgraded ship).
+
+A ship is a Default class name ("Cruiser", "War Sun", "Space Cannon"), an object with
+"type", optional "upgraded" and "count", or {"custom": {Ship parameters}, "count": n}.
+"""
+from Ships import *  # assuming Ships module is present with the Default classes
+import argparse
+import csv
+import json
+import os
+import sys
+from result_cache import ResultCache, cached_army_statistics, cached_simulate_fight
+from army_stat import exact_hit_statistics
+
+ENGINES = ("loop", "vectorized", "exact", "adaptive")
+METHODS = ("exact", "simulation", "normal", "truncated_normal")
+
+
+def _ship_key(name: str) -> str:
+    return name.replace(" ", "").replace("_", "").replace("-", "").lower()
+
+
+# "Cruiser" -> DefaultCruiser, "War Sun" -> DefaultWarSun, "Space Cannon" -> SpaceCannon
+SHIP_TYPES = {
+    _ship_key(ship_class.__name__.removeprefix("Default")): ship_class
+    for ship_class in (DefaultCruiser, DefaultDreadnought, DefaultFlagship, DefaultCarrier,
+                       DefaultFighter, DefaultDestroyer, DefaultWarSun, SpaceCannon)
+}
+
+
+def make_ship(type_name: str, upgraded=False) -> Ship:
+    ship_class = SHIP_TYPES.get(_ship_key(type_name))
+    if ship_class is None:
+        raise ValueError(f"Unknown ship type: {type_name}")
+    if upgraded and ship_class.upgrade is Ship.upgrade:
+        raise ValueError(f"{type_name} has no upgraded version")
+    ship = ship_class()
+    if upgraded:
+        ship.upgrade(1)
+    return ship
+
+
+def parse_ship_entry(entry) -> list[Ship]:
+    # One scenario ship entry -> the ships it stands for
+    if isinstance(entry, str):
+        return parse_compact_entry(entry)
+    if not isinstance(entry, dict):
+        raise ValueError(f"Invalid ship entry: {entry!r}")
+
+    count = int(entry.get("count", 1))
+    if "custom" in entry:
+        return [Ship(**entry["custom"]) for _ in range(count)]
+    return [make_ship(entry["type"], entry.get("upgraded", False)) for _ in range(count)]
+
+
+def parse_compact_entry(text: str) -> list[Ship]:
+    # "2x Cruiser+" -> two upgraded cruisers
+    text = text.strip()
+    count = 1
+    head, _, rest = text.partition("x ")
+    if rest and head.strip().isdigit():
+        count, text = int(head), rest.strip()
+    upgraded = text.endswith("+")
+    return [make_ship(text.rstrip("+").strip(), upgraded) for _ in range(count)]
+
+
+def parse_army(value, fleets: dict) -> list[Ship]:
+    # A fleet name, a compact "2x Cruiser, Dreadnought+" string or a list of ship entries
+    if isinstance(value, str):
+        if value in fleets:
+            return fleets[value]
+        value = [part for part in value.split(",") if part.strip()]
+    if not isinstance(value, list):
+        raise ValueError(f"Invalid army: {value!r}")
+    army = [ship for entry in value for ship in parse_ship_entry(entry)]
+    if not army:
+        raise ValueError("Army has no ships")
+    return army
+
+
+def read_scenarios(path: str, file_format: str):
+    """
+    Yield (line number, record) pairs from a scenario file.
+
+    JSONL and CSV files are read line by line, so the number of matchups does not
+    affect memory. Records are passed on unchecked (JSONL lines as text, fleet
+    definitions as {"fleet": name, "ships": ships}); run_record decodes them, so a
+    bad record only fails itself.
+    """
+    with open(path, newline="") as f:
+        if file_format == "json":
+            scenario = json.load(f)
+            for name, ships in scenario.get("fleets", {}).items():
+                yield f"fleet {name}", {"fleet": name, "ships": ships}
+            yield from enumerate(scenario.get("matchups", []), start=1)
+        elif file_format == "jsonl":
+            for number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield number, line
+        elif file_format == "csv":
+            for number, row in enumerate(csv.DictReader(f), start=2):
+                yield number, {key: value for key, value in row.items() if key and value not in (None, "")}
+        else:
+            raise ValueError(f"Unknown scenario format: {file_format}")
+
+
+def run_record(number, record, fleets: dict, defaults: argparse.Namespace, cache: ResultCache) -> dict:
+    """
+    Output line for one scenario record, or None for a fleet definition that worked.
+
+    Fleet definitions are added to ``fleets``. Any problem with the record (bad JSON,
+    unknown ship or fleet, invalid option) becomes an "error" entry in the output.
+    """
+    output = {"id": number}
+    try:
+        if isinstance(record, str):
+            record = json.loads(record)
+        if not isinstance(record, dict):
+            raise ValueError(f"Invalid record: {record!r}")
+        if "fleet" in record:
+            output["fleet"] = record["fleet"]
+            fleets[record["fleet"]] = parse_army(record["ships"], fleets)
+            return None
+        output["id"] = record.get("id", number)
+        output.update(run_matchup(record, fleets, defaults, cache))
+    except (KeyError, ValueError, TypeError) as error:
+        output["error"] = f"{type(error).__name__}: {error}"
+    return output
+
+
+def run_matchup(matchup: dict, fleets: dict, defaults: argparse.Namespace, cache: ResultCache) -> dict:
+    seed = matchup.get("seed", defaults.seed)
+    seed = None if seed is None else int(seed)
+
+    if "army1" in matchup or "army2" in matchup:
+        armies = [parse_army(matchup["army1"], fleets), parse_army(matchup["army2"], fleets)]
+        engine = matchup.get("engine", defaults.engine)
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        n_fights = int(matchup.get("n_fights", defaults.n_fights))
+        precision = float(matchup.get("precision", defaults.precision))
+        result = cached_simulate_fight(armies, engine=engine, n_fights=n_fights, precision=precision,
+                                       max_seconds=defaults.max_seconds, seed=seed, cache=cache)
+        return {"engine": engine, "result": result.to_dict(defaults.top)}
+
+    army = parse_army(matchup["army"], fleets)
+    method = matchup.get("method", defaults.method)
+    if method not in METHODS:
+        raise ValueError(f"Unknown statistics method: {method}")
+    n_simulations = int(matchup.get("n_fights", defaults.n_fights))
+    output = {"method": method}
+    if method == "exact":
+        statistics = exact_hit_statistics(army)
+        statistics["quantiles"] = {str(q): hits for q, hits in statistics["quantiles"].items()}
+        output["statistics"] = statistics
+    output["report"] = cached_army_statistics(army, method=method, num_simulations=n_simulations,
+                                              seed=seed, cache=cache)
+    return output
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run fleet matchups from a scenario file and stream JSON results.")
+    parser.add_argument("scenarios", help="scenario file (.json, .jsonl or .csv)")
+    parser.add_argument("--format", choices=("json", "jsonl", "csv"),
+                        help="scenario format (default: from the file extension)")
+    parser.add_argument("--fleets", help="JSON file with named fleets: {name: [ships]}")
+    parser.add_argument("--engine", choices=ENGINES, default="vectorized", help="default fight engine")
+    parser.add_argument("--method", choices=METHODS, default="exact", help="default army statistics method")
+    parser.add_argument("--n-fights", type=int, default=10000, help="default trials per matchup")
+    parser.add_argument("--precision", type=float, default=0.01, help="target interval width for the adaptive engine")
+    parser.add_argument("--max-seconds", type=float, default=None, help="time limit per adaptive matchup")
+    parser.add_argument("--seed", type=int, default=None, help="default seed")
+    parser.add_argument("--top", type=int, default=5, help="survivor combinations reported per army")
+    parser.add_argument("-o", "--output", help="output JSONL file (default: stdout)")
+    parser.add_argument("--cache-size", type=int, default=1024, help="matchups kept in the result cache")
+    parser.add_argument("--cache-file", help="persist the result cache to this file")
+    args = parser.parse_args(argv)
+
+    file_format = args.format or os.path.splitext(args.scenarios)[1].lstrip(".").lower()
+    fleets = {}
+    if args.fleets:
+        with open(args.fleets) as f:
+            for name, ships in json.load(f).items():
+                fleets[name] = parse_army(ships, fleets)
+
+    cache = ResultCache(max_entries=args.cache_size, path=args.cache_file)
+    output = open(args.output, "w") if args.output else sys.stdout
+    failures = 0
+    try:
+        for number, record in read_scenarios(args.scenarios, file_format):
+            # A bad record is reported in the stream and the sweep goes on
+            result = run_record(number, record, fleets, args, cache)
+            if result is None:
+                continue
+            failures += "error" in result
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        cache.close()
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+Reproducible benchmarks for the combat and statistics hot paths.
+
+    python benchmarks.py                        # full grid
+    python benchmarks.py --quick --filter roll  # subset, fewer repetitions
+    python benchmarks.py --save baseline.json   # keep the numbers
+    python benchmarks.py --compare baseline.json
+
+Every benchmark runs over the same grid of fleets (1 vs 1 cruiser, mixed 10-ship
+fleets and fighter swarms of growing size, which give the scaling curve) with a
+fixed seed. Every case is timed for at least ``--min-time`` seconds (and at least
+``--repeat`` runs); throughput is the median rate and the spread is the interquartile
+range of the relative rates (below) over their median. Peak memory comes from a
+separate run under tracemalloc.
+
+Every timed sample is followed by a fixed calibration workload. The "relative" rate
+(work units per calibration run) cancels out how fast the machine happens to be at
+that moment, which varies far more between runs than within one. --compare uses it
+and only flags a result as slower when the drop is larger than the spread measured
+in both runs (and at least REGRESSION_FLOOR).
+"""
+from Ships import *  # assuming Ships module is present with the Default classes
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from fight_simulation import ArmyState, DiceBuffer, assign_damage, precombat_phase, roll_hits, simulate_fight
+from vectorized_simulation import simulate_fight_vectorized
+from army_stat import get_statistics_normal, get_statistics_simulation
+
+SEED = 12345
+SWARM_SIZES = (25, 100, 200)
+# Shortest timed sample; quick runs are repeated within a sample until it is this long
+SAMPLE_SECONDS = 0.05
+# Smallest relative slowdown --compare flags, however steady the measurements were:
+# relative rates of two full runs of unchanged code stayed within 20% on a shared machine
+REGRESSION_FLOOR = 0.2
+# A slowdown is flagged when it exceeds this many times the combined spread of both runs
+SPREAD_FACTOR = 1.0
+
+
+def mixed_fleet(upgraded=False) -> list[Ship]:
+    fleet = [DefaultDreadnought(), DefaultDreadnought(), DefaultCruiser(), DefaultCruiser(), DefaultDestroyer(),
+             DefaultCarrier(), DefaultFighter(), DefaultFighter(), DefaultFighter(), DefaultFighter()]
+    if upgraded:
+        for ship in fleet:
+            ship.upgrade(1)
+    return fleet
+
+
+def fighter_swarm(n_fighters: int) -> list[Ship]:
+    # Carriers are needed to bring the fighters; the fighters dominate the fleet size
+    return [DefaultCarrier() for _ in range(max(1, n_fighters // 4))] + [DefaultFighter() for _ in range(n_fighters)]
+
+
+def scenarios() -> dict[str, tuple[list[Ship], list[Ship]]]:
+    grid = {
+        "1v1 cruiser": ([DefaultCruiser()], [DefaultCruiser()]),
+        "mixed 10": (mixed_fleet(), mixed_fleet(upgraded=True)),
+    }
+    for n_fighters in SWARM_SIZES:
+        grid[f"swarm {n_fighters}"] = (fighter_swarm(n_fighters), mixed_fleet(upgraded=True))
+    return grid
+
+
+# Each benchmark turns (army 1, army 2, quick) into (function to time, work units per call, unit name)
+def bench_roll_hits(army1, army2, quick):
+    state, dice = ArmyState(army1), DiceBuffer(np.random.default_rng(SEED))
+    calls = 2000 if quick else 20000
+
+    def run():
+        for _ in range(calls):
+            roll_hits(state, dice)
+    return run, calls, "calls"
+
+
+def bench_roll_hits_uncached(army1, army2, quick):
+    # Every call meets a fleet state whose hit CDF is not cached, as after each loss in a fight
+    state, dice = ArmyState(army1), DiceBuffer(np.random.default_rng(SEED))
+    calls = 200 if quick else 2000
+    losses = len(state.specs)
+
+    def run():
+        for call in range(calls):
+            state.reset()
+            assign_damage(state, call % losses)
+            state.hit_cdfs.clear()
+            roll_hits(state, dice)
+    return run, calls, "calls"
+
+
+def bench_assign_damage(army1, army2, quick):
+    state = ArmyState(army2)
+    calls = 2000 if quick else 20000
+    hits = max(1, len(army2) // 2)
+
+    def run():
+        for _ in range(calls):
+            state.reset()
+            assign_damage(state, hits)
+    return run, calls, "calls"
+
+
+def bench_precombat_phase(army1, army2, quick):
+    state1, state2, dice = ArmyState(army1), ArmyState(army2), DiceBuffer(np.random.default_rng(SEED))
+    calls = 2000 if quick else 20000
+
+    def run():
+        for _ in range(calls):
+            state1.reset()
+            state2.reset()
+            precombat_phase(state1, state2, dice)
+    return run, calls, "calls"
+
+
+def bench_simulate_fight(army1, army2, quick):
+    n_fights = 500 if quick else 5000
+    return lambda: simulate_fight([army1, army2], n_fights=n_fights, seed=SEED), n_fights, "fights"
+
+
+def bench_simulate_fight_vectorized(army1, army2, quick):
+    n_fights = 10000 if quick else 100000
+    return lambda: simulate_fight_vectorized([army1, army2], n_fights=n_fights, seed=SEED), n_fights, "fights"
+
+
+def bench_get_statistics_simulation(army1, army2, quick):
+    n_simulations = 10000 if quick else 100000
+    return (lambda: get_statistics_simulation(army1, n_simulations, rng=np.random.default_rng(SEED)),
+            n_simulations, "samples")
+
+
+def bench_get_statistics_normal(army1, army2, quick):
+    calls = 20 if quick else 200
+
+    def run():
+        for _ in range(calls):
+            get_statistics_normal(army1)
+    return run, calls, "calls"
+
+
+BENCHMARKS = {
+    "roll_hits": bench_roll_hits,
+    "roll_hits_uncached": bench_roll_hits_uncached,
+    "assign_damage": bench_assign_damage,
+    "precombat_phase": bench_precombat_phase,
+    "simulate_fight": bench_simulate_fight,
+    "simulate_fight_vectorized": bench_simulate_fight_vectorized,
+    "get_statistics_simulation": bench_get_statistics_simulation,
+    "get_statistics_normal": bench_get_statistics_normal,
+}
+
+
+_calibration_data = np.random.default_rng(SEED).random(100000)
+
+
+def calibration() -> float:
+    # Fixed mix of interpreter and NumPy work, timed next to every sample
+    start = time.perf_counter()
+    total = 0
+    for i in range(100000):
+        total += i * i
+    np.cumsum(np.sort(_calibration_data))
+    return time.perf_counter() - start
+
+
+def measure(run, repeat: int, min_seconds: float) -> tuple[list[float], list[float], int]:
+    # Seconds per run of at least `repeat` samples filling `min_seconds` after a warm-up,
+    # the calibration time after each sample, then peak traced memory of one more run.
+    # A sample repeats run() for at least SAMPLE_SECONDS, so fast benchmarks are not
+    # dominated by timer and scheduler noise
+    run()
+    times, calibrations = [], []
+    started = time.perf_counter()
+    while len(times) < repeat or time.perf_counter() - started < min_seconds:
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            run()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= SAMPLE_SECONDS:
+                break
+        times.append(elapsed / calls)
+        calibrations.append(calibration())
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return times, calibrations, peak
+
+
+def regression_tolerance(result: dict, baseline: dict) -> float:
+    # Relative slowdown below which the difference is treated as noise
+    spread = result.get("spread", 0.0) + baseline.get("spread", 0.0)
+    return max(REGRESSION_FLOOR, SPREAD_FACTOR * spread)
+
+
+def speed_ratio(result: dict, baseline: dict) -> float:
+    # Relative rates when both runs have them (older baselines only have raw rates)
+    key = "relative_rate" if "relative_rate" in result and "relative_rate" in baseline else "rate"
+    return result[key] / baseline[key]
+
+
+def is_regression(result: dict, baseline: dict) -> bool:
+    return speed_ratio(result, baseline) < 1 - regression_tolerance(result, baseline)
+
+
+def run_benchmarks(names=None, quick=False, repeat=3, name_filter=None, min_seconds=1.0) -> list[dict]:
+    results = []
+    for benchmark in names or BENCHMARKS:
+        for scenario, (army1, army2) in scenarios().items():
+            label = f"{benchmark} [{scenario}]"
+            if name_filter and name_filter not in label:
+                continue
+            run, units, unit = BENCHMARKS[benchmark](army1, army2, quick)
+            times, calibrations, peak = measure(run, repeat, min_seconds)
+            rates = units / np.array(times)
+            relative_rates = rates * np.median(calibrations)
+            low, median, high = np.percentile(relative_rates, [25, 50, 75])
+            results.append({
+                "benchmark": benchmark,
+                "scenario": scenario,
+                "rate": float(np.median(rates)),
+                "relative_rate": float(median),
+                "spread": float((high - low) / median),
+                "runs": len(times),
+                "unit": unit,
+                "seconds": float(np.median(times)),
+                "peak_kib": peak / 1024,
+            })
+            print(format_row(results[-1]), flush=True)
+    return results
+
+
+def format_row(result: dict, baseline: dict = None) -> str:
+    line = (f"{result['benchmark']:<27} {result['scenario']:<12} {result['rate']:>14,.0f} {result['unit'] + '/s':<10}"
+            f" ±{result.get('spread', 0.0) * 100:>4.1f}% {result['peak_kib']:>10,.0f} KiB")
+    if baseline is not None:
+        ratio = speed_ratio(result, baseline)
+        flag = "  SLOWER" if is_regression(result, baseline) else ""
+        line += f"  x{ratio:.2f} vs baseline (noise ±{regression_tolerance(result, baseline) * 100:.0f}%){flag}"
+    return line
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the combat and statistics hot paths.")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads")
+    parser.add_argument("--repeat", type=int, default=5, help="minimum timed runs per benchmark (median is kept)")
+    parser.add_argument("--min-time", type=float, default=None,
+                        help="minimum seconds of timed runs per benchmark (default 1, 0.2 with --quick)")
+    parser.add_argument("--filter", help="only run benchmarks whose 'name [scenario]' contains this text")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    args = parser.parse_args(argv)
+
+    min_seconds = args.min_time if args.min_time is not None else (0.2 if args.quick else 1.0)
+    results = run_benchmarks(quick=args.quick, repeat=args.repeat, name_filter=args.filter, min_seconds=min_seconds)
+
+    regressions = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(row["benchmark"], row["scenario"]): row for row in json.load(f)["results"]}
+        print(f"\nCompared with {args.compare}:")
+        for result in results:
+            reference = baseline.get((result["benchmark"], result["scenario"]))
+            if reference is None:
+                continue
+            print(format_row(result, reference))
+            regressions += is_regression(result, reference)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment(), "quick": args.quick, "results": results}, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
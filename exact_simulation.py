@@ -0,0 +1,214 @@
+from Ships import *  # assuming Ships module is present with the Default classes
+from collections import defaultdict
+import numpy as np
+from fight_simulation import FightResult, SurvivorCodec, as_specs, poisson_binomial_pmf, removal_order
+
+
+class ExactArmy:
+    """
+    Static description of one army for the exact solver.
+
+    A state of the army is an alive mask (tuple of bools in army order) plus the number
+    of sustain damage still available. Nothing else influences the rest of the fight.
+    """
+    def __init__(self, army: list[Ship], removal_policy="combat"):
+        army = as_specs(army)  # UnitGroups get one slot per unit
+        self.size = len(army)
+        self.codec = SurvivorCodec(army)
+        self.combat = [ship.combat for ship in army]
+        self.hits = [ship.hits for ship in army]
+        # Order in which damage removes ships (see fight_simulation.REMOVAL_POLICIES)
+        self.removal_order = removal_order(army, removal_policy)
+        self.fighters = [i for i in self.removal_order if army[i].is_fighter]
+        self.cannons = [i for i, ship in enumerate(army) if ship.is_space_cannon]
+        self.barrage = [(i, ship.anti_fighter_combat, ship.anti_fighter_hits)
+                        for i, ship in enumerate(army) if ship.anti_fighter_barrage]
+        self.sustain = sum(1 for ship in army if ship.sustain_damage)
+        self._pmf_cache = {}
+
+    def survivor_code(self, slots: tuple, sustain: int) -> int:
+        return sum(self.codec.slot_weight[i] for i in slots) + sustain * self.codec.sustain_weight
+
+    def start_state(self):
+        return (True,) * self.size, self.sustain
+
+    def combat_pmf(self, alive_slots: tuple) -> np.ndarray:
+        # Hits rolled in one combat round by the ships in alive_slots
+        pmf = self._pmf_cache.get(alive_slots)
+        if pmf is None:
+            pmf = poisson_binomial_pmf((self.combat[i], self.hits[i]) for i in alive_slots)
+            self._pmf_cache[alive_slots] = pmf
+        return pmf
+
+    def barrage_pmf(self, mask: tuple) -> np.ndarray:
+        return poisson_binomial_pmf((combat, n_dice) for i, combat, n_dice in self.barrage if mask[i])
+
+    def cannon_pmf(self, mask: tuple) -> np.ndarray:
+        # Each space cannon fires a single die
+        return poisson_binomial_pmf((self.combat[i], 1) for i in self.cannons if mask[i])
+
+    @staticmethod
+    def remove_first(mask: tuple, order, hits: int) -> tuple:
+        # Kill the first `hits` alive ships when walking `order`
+        mask = list(mask)
+        for i in order:
+            if hits <= 0:
+                break
+            if mask[i]:
+                mask[i] = False
+                hits -= 1
+        return tuple(mask)
+
+    def take_damage(self, state, hits: int):
+        # Same rule as fight_simulation.assign_damage: sustain damage first, then ships in removal-policy order
+        mask, sustain = state
+        absorbed = min(hits, sustain)
+        return self.remove_first(mask, self.removal_order, hits - absorbed), sustain - absorbed
+
+    def lose_fighters(self, state, hits: int):
+        mask, sustain = state
+        return self.remove_first(mask, self.fighters, hits), sustain
+
+    def without_cannons(self, state):
+        mask, sustain = state
+        return tuple(alive and i not in self.cannons for i, alive in enumerate(mask)), sustain
+
+
+def _branch(distribution: dict, pmf_of, apply) -> dict:
+    # Expand a {(state1, state2): probability} distribution over a random number of hits
+    result = defaultdict(float)
+    for states, prob in distribution.items():
+        pmf = pmf_of(states)
+        for hits, p_hits in enumerate(pmf):
+            if p_hits > 0:
+                result[apply(states, hits)] += prob * p_hits
+    return result
+
+
+def precombat_distribution(army1: ExactArmy, army2: ExactArmy) -> dict:
+    """
+    Exact distribution of both armies' states after fight_simulation.precombat_phase.
+
+    Follows the same order: anti-fighter barrage of army 1 then army 2, space cannon
+    fire of army 1 then army 2 (only surviving cannons shoot), then cannons leave combat.
+    """
+    distribution = {(army1.start_state(), army2.start_state()): 1.0}
+
+    distribution = _branch(distribution, lambda s: army1.barrage_pmf(s[0][0]),
+                           lambda s, h: (s[0], army2.lose_fighters(s[1], h)))
+    distribution = _branch(distribution, lambda s: army2.barrage_pmf(s[1][0]),
+                           lambda s, h: (army1.lose_fighters(s[0], h), s[1]))
+    distribution = _branch(distribution, lambda s: army1.cannon_pmf(s[0][0]),
+                           lambda s, h: (s[0], army2.take_damage(s[1], h)))
+    distribution = _branch(distribution, lambda s: army2.cannon_pmf(s[1][0]),
+                           lambda s, h: (army1.take_damage(s[0], h), s[1]))
+
+    result = defaultdict(float)
+    for (state1, state2), prob in distribution.items():
+        result[(army1.without_cannons(state1), army2.without_cannons(state2))] += prob
+    return result
+
+
+def _clip(pmf: np.ndarray, max_hits: int) -> np.ndarray:
+    # Hits beyond what the target can absorb all lead to the same state
+    if pmf.size <= max_hits + 1:
+        return pmf
+    clipped = pmf[:max_hits + 1].copy()
+    clipped[-1] += pmf[max_hits + 1:].sum()
+    return clipped
+
+
+def solve_combat(army1: ExactArmy, army2: ExactArmy, state1, state2):
+    """
+    Exact outcome of the combat rounds starting from the given states.
+
+    Because damage always goes to sustain first and then to ships in removal-policy
+    order, an army's state during the rounds is fully described by the total damage it
+    has taken. The grid of (damage army 1, damage army 2) is filled in increasing order;
+    rounds where neither army hits are folded out by renormalising the other outcomes.
+
+    Returns (army 1 win outcomes, army 2 win outcomes, draw probability), where the
+    outcomes map each winner's (surviving slot tuple, sustain left) to its probability.
+    """
+    wins1, wins2 = defaultdict(float), defaultdict(float)
+
+    def ordered_alive(army, mask):
+        return [i for i in army.removal_order if mask[i]]
+
+    alive1, sustain1 = ordered_alive(army1, state1[0]), state1[1]
+    alive2, sustain2 = ordered_alive(army2, state2[0]), state2[1]
+
+    def survivors(alive, sustain, damage):
+        return tuple(sorted(alive[max(damage - sustain, 0):]))
+
+    def outcome(alive, sustain, damage):
+        return survivors(alive, sustain, damage), max(sustain - damage, 0)
+
+    if not alive1 or not alive2:
+        if alive1:
+            wins1[outcome(alive1, sustain1, 0)] += 1.0
+        elif alive2:
+            wins2[outcome(alive2, sustain2, 0)] += 1.0
+        return wins1, wins2, 0.0 if (alive1 or alive2) else 1.0
+
+    health1 = len(alive1) + sustain1
+    health2 = len(alive2) + sustain2
+    grid = np.zeros((health1 + 1, health2 + 1))
+    grid[0, 0] = 1.0
+    draw = 0.0
+
+    for damage1 in range(health1):
+        pmf1 = army1.combat_pmf(survivors(alive1, sustain1, damage1))
+        for damage2 in range(health2):
+            mass = grid[damage1, damage2]
+            if mass == 0:
+                continue
+            pmf2 = army2.combat_pmf(survivors(alive2, sustain2, damage2))
+            # Army 1's hits damage army 2 and vice versa
+            hits_on_2 = _clip(pmf1, health2 - damage2)
+            hits_on_1 = _clip(pmf2, health1 - damage1)
+            transition = np.outer(hits_on_1, hits_on_2)
+            no_hits = transition[0, 0]
+            if no_hits >= 1.0:
+                # Neither army can ever hit: the fight never ends, count it as a draw
+                draw += mass
+                continue
+            transition[0, 0] = 0.0
+            grid[damage1:damage1 + hits_on_1.size, damage2:damage2 + hits_on_2.size] += mass * transition / (1.0 - no_hits)
+
+    for damage2 in range(health2):
+        wins2[outcome(alive2, sustain2, damage2)] += grid[health1, damage2]
+    for damage1 in range(health1):
+        wins1[outcome(alive1, sustain1, damage1)] += grid[damage1, health2]
+    draw += grid[health1, health2]
+    return wins1, wins2, draw
+
+
+def simulate_fight_exact(armies: list[list[Ship]], removal_policy="combat") -> FightResult:
+    """
+    Exact counterpart of simulate_fight: solves the fight as a Markov chain instead of
+    sampling it. The FightResult holds exact probabilities as counts out of a single
+    fight (n_fights = 1); the number of rounds is not tracked.
+    """
+    return solve_exact(ExactArmy(armies[0], removal_policy), ExactArmy(armies[1], removal_policy))
+
+
+def solve_exact(army1: ExactArmy, army2: ExactArmy) -> FightResult:
+    # simulate_fight_exact for prebuilt armies; an ExactArmy keeps its round PMF cache between matchups
+    result = FightResult([army1.codec, army2.codec], n_fights=1)
+
+    for (state1, state2), prob in precombat_distribution(army1, army2).items():
+        wins1, wins2, draw = solve_combat(army1, army2, state1, state2)
+        result.draws += prob * draw
+        for army, wins, label in ((army1, wins1, "Army 1"), (army2, wins2, "Army 2")):
+            for (slots, sustain), p_win in wins.items():
+                result.add_win(label, army.survivor_code(slots, sustain), prob * p_win)
+
+    return result
+
+
+if __name__ == "__main__":
+    army_1 = [DefaultCruiser(), DefaultCruiser()]
+    army_2 = [DefaultCruiser()]
+
+    print(simulate_fight_exact([army_1, army_2]))
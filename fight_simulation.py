@@ -1,101 +1,318 @@
 from Ships import *  # assuming Ships module is present with the Default classes
-import random
-from collections import Counter
+from bisect import bisect_right
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import astuple
+from functools import partial
+from itertools import repeat
+import json
+import time
 import numpy as np
+from scipy.stats import binom
 
-def roll_hits(army: list[Ship]) -> int:
-    if not army:
-        return 0
-    thresholds = np.concatenate([np.full(ship.hits, ship.combat) for ship in army])
-    rolls = np.random.randint(1, 11, size=thresholds.size)
-    return int(np.sum(rolls >= thresholds))
 
+ARMY_LABELS = ("Army 1", "Army 2")
 
-# Function to simulate a fight between two armies
-def simulate_fight(armies: list[list[Ship]], n_fights=10000):
-    results = {"Army 1 Wins": 0, "Army 2 Wins": 0}
-    remaining_ships = {"Army 1": [], "Army 2": []}
-    full_survival = {"Army 1": 0, "Army 2": 0}
+# d10 rolls and uniforms drawn from the generator at a time by DiceBuffer
+# (uniforms are kept as Python floats, so their block is smaller)
+DICE_BLOCK = 1 << 16
+UNIFORM_BLOCK = 1 << 12
+# Distinct fleet states whose round hit CDF an ArmyState keeps (least recently used are evicted)
+HIT_CDF_CACHE_SIZE = 4096
 
-    
-    for _ in range(n_fights):
-        army_1, army_2 = armies
-        
-        # Create copies of the armies for each simulation
-        army_1_ships = [ship.copy() for ship in army_1]
-        army_2_ships = [ship.copy() for ship in army_2]
-        
-        # Apply precombat effects and return armies
-        army1_post, army2_post = precombat_phase(army_1_ships, army_2_ships)
-        army_1_ships, army_2_ships = army1_post, army2_post  # override once
-        
-        while army_1_ships and army_2_ships:
-            # Roll a die for each ship and assign hits to the opposing army
-            # NEW CODE – fast
-            army_1_hits = roll_hits(army_1_ships)
-            army_2_hits = roll_hits(army_2_ships)
 
-            
-            # Assign damage to the opposing army (first use sustain damage, then weakest combat ships)
-            # Remove destroyed ships, do that in the assign damage function
-            army_2_ships = assign_damage(army_2_ships, army_1_hits)
-            army_1_ships = assign_damage(army_1_ships, army_2_hits)
-            #repeat untill one of the lists is empty
-            #print(f"Hits: A1={army_1_hits}, A2={army_2_hits}, A1 size={len(army_1_ships)}, A2 size={len(army_2_ships)}")
+class DiceBuffer:
+    """
+    Random numbers for the scalar engine, taken from pre-generated blocks of one np.random.Generator.
+
+    uniform() feeds the combat rounds: roll_hits turns one uniform into the round's
+    hit count by bisecting the fleet state's cached hit CDF, so no per-die threshold
+    comparison is made. roll() gives ``uint8`` d10 rolls (blocks of DICE_BLOCK) for
+    the few dice still rolled one by one, anti-fighter barrage and space cannons.
+    Refilling whole blocks avoids a generator call per draw, and the same generator
+    state always gives the same sequence.
+    """
+    def __init__(self, rng: np.random.Generator, block_size=DICE_BLOCK):
+        self.rng = rng
+        self.block_size = block_size
+        self._block = np.empty(0, dtype=np.uint8)
+        self._position = 0
+        self._uniforms = []
+        self._uniform_position = 0
+
+    def roll(self, n: int) -> np.ndarray:
+        if self._position + n > self._block.size:
+            # Rolls left in the old block are dropped, which keeps the sequence deterministic
+            self._block = self.rng.integers(1, 11, size=max(self.block_size, n), dtype=np.uint8)
+            self._position = 0
+        rolls = self._block[self._position:self._position + n]
+        self._position += n
+        return rolls
+
+    def uniform(self) -> float:
+        # One uniform draw in [0, 1), from its own block (kept as a list for fast scalar access)
+        if self._uniform_position == len(self._uniforms):
+            self._uniforms = self.rng.random(UNIFORM_BLOCK).tolist()
+            self._uniform_position = 0
+        value = self._uniforms[self._uniform_position]
+        self._uniform_position += 1
+        return value
+
+
+def _hit_chance(combat: int) -> float:
+    # A die hits on combat value or higher
+    return min(max((11 - combat) / 10, 0.0), 1.0)
+
+
+def scores_hits(spec: ShipSpec) -> bool:
+    # Whether a ship's combat dice can ever hit (space cannons only fire before combat).
+    # Once no surviving ship on either side does, the engines end the fight as a draw.
+    return spec.hits > 0 and _hit_chance(spec.combat) > 0 and not spec.is_space_cannon
+
+
+def poisson_binomial_pmf(dice) -> np.ndarray:
+    """
+    Exact distribution of the number of hits for a collection of dice.
 
+    ``dice`` is an iterable of (combat value, number of dice) pairs. Dice that share a
+    combat value form one binomial and the binomials are convolved together, so the
+    cost depends on the number of distinct combat values rather than on the fleet size.
+    """
+    grouped = defaultdict(int)
+    for combat, n_dice in dice:
+        grouped[combat] += n_dice
+
+    pmf = np.ones(1)
+    for combat, n_dice in grouped.items():
+        if n_dice <= 0:
+            continue
+        pmf = np.convolve(pmf, binom.pmf(np.arange(n_dice + 1), n_dice, _hit_chance(combat)))
+    return pmf
+
+
+def _removal_tie_break(spec: ShipSpec) -> tuple:
+    # Among ships a policy ranks equally the cheapest non-transport goes first, and the
+    # remaining stats settle the rest, so the removal order never depends on army order
+    return spec.capacity, spec.cost, astuple(spec)
+
+
+# Order in which ships are lost once sustain damage is used up (anti-fighter barrage
+# takes fighters in the same order). "combat" (the default) loses the highest combat
+# value, i.e. the weakest ship, first.
+REMOVAL_POLICIES = {
+    "combat": lambda spec: (-spec.combat, _removal_tie_break(spec)),
+    "cheapest": lambda spec: (spec.cost, -spec.combat, _removal_tie_break(spec)),
+    "fighters_first": lambda spec: (not spec.is_fighter, -spec.combat, _removal_tie_break(spec)),
+    "keep_flagship": lambda spec: (spec.is_flagship, -spec.combat, _removal_tie_break(spec)),
+    # Ships with capacity go last, so an invasion keeps its ground forces' transports
+    "keep_transports": lambda spec: (spec.capacity > 0, -spec.combat, _removal_tie_break(spec)),
+}
+
+
+def as_specs(army: list[Ship]) -> list[ShipSpec]:
+    # One spec per unit; UnitGroups are expanded
+    specs = []
+    for unit in army:
+        if isinstance(unit, UnitGroup):
+            specs.extend([unit.spec] * unit.count)
+        else:
+            specs.append(unit.spec() if isinstance(unit, Ship) else unit)
+    return specs
 
-        # Check who won and log the result
-        if army_1_ships and not army_2_ships:
-            results["Army 1 Wins"] += 1
-            if len(army_1_ships) == len(army_1):
-                full_survival["Army 1"] += 1
-            remaining_ships["Army 1"].append(tuple(str(ship.name) for ship in army_1_ships))
-
-        elif army_2_ships and not army_1_ships:
-            results["Army 2 Wins"] += 1
-            if len(army_2_ships) == len(army_2):
-                full_survival["Army 2"] += 1
-            remaining_ships["Army 2"].append(tuple(str(ship.name) for ship in army_2_ships))
 
+def is_grouped(army: list[Ship]) -> bool:
+    return any(isinstance(unit, UnitGroup) for unit in army)
+
+
+def to_groups(army: list[Ship]) -> list[UnitGroup]:
+    # Count-compressed form of an army; only neighbouring identical units are merged
+    # (the engines sort groups into removal order themselves)
+    groups = []
+    for unit in army:
+        group = unit if isinstance(unit, UnitGroup) else UnitGroup.of(unit, 1)
+        if group.count <= 0:
+            continue
+        if groups and groups[-1].spec == group.spec:
+            groups[-1] = UnitGroup(group.spec, groups[-1].count + group.count)
         else:
-            results["Draws"] = results.get("Draws", 0) + 1
+            groups.append(group)
+    return groups
 
-    # Calculate the probability of each army winning
-    prob_army_1_win = results["Army 1 Wins"] / n_fights
-    prob_army_2_win = results["Army 2 Wins"] / n_fights
-    draw_rate = results.get("Draws", 0) / n_fights
 
-    # Find the most frequent remaining ship combination
-    most_frequent_army_1 = Counter(remaining_ships["Army 1"]).most_common(1)
-    most_frequent_army_2 = Counter(remaining_ships["Army 2"]).most_common(1)
+def removal_order(army: list[Ship], policy="combat") -> list[int]:
+    # Slots of the army in the order damage removes them under the given removal policy
+    if policy not in REMOVAL_POLICIES:
+        raise ValueError(f"Unknown removal policy: {policy}")
+    key = REMOVAL_POLICIES[policy]
+    specs = as_specs(army)
+    return sorted(range(len(specs)), key=lambda i: key(specs[i]))
 
-    if results["Army 1 Wins"] > 0 and most_frequent_army_1:
-        army_1_mode_str = " ".join(most_frequent_army_1[0][0])
-        army_1_mode_percentage = most_frequent_army_1[0][1] / results["Army 1 Wins"] * 100
-    else:
-        army_1_mode_str = "N/A (no wins)"
-        army_1_mode_percentage = 0.0
 
-    if results["Army 2 Wins"] > 0 and most_frequent_army_2:
-        army_2_mode_str = " ".join(most_frequent_army_2[0][0])
-        army_2_mode_percentage = most_frequent_army_2[0][1] / results["Army 2 Wins"] * 100
-    else:
-        army_2_mode_str = "N/A (no wins)"
-        army_2_mode_percentage = 0.0
+def spawn_streams(seed, n: int) -> list:
+    # n independent child streams of an int, np.random.SeedSequence, np.random.Generator or None
+    if isinstance(seed, np.random.Generator):
+        return seed.spawn(n)
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return seed_sequence.spawn(n)
+
 
+def as_seed_sequence(seed) -> np.random.SeedSequence:
+    # A SeedSequence that can start several identical streams; a Generator gives a fresh child of its own
+    if isinstance(seed, np.random.Generator):
+        return seed.bit_generator.seed_seq.spawn(1)[0]
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
 
-    # Calculate the percentage of times the most frequent remaining ship combination occurred
 
-    army_1_full_survival_rate = full_survival["Army 1"] / results["Army 1 Wins"] * 100 if results["Army 1 Wins"] > 0 else 0
-    army_2_full_survival_rate = full_survival["Army 2"] / results["Army 2 Wins"] * 100 if results["Army 2 Wins"] > 0 else 0
+class SurvivorCodec:
+    """
+    Encodes what is left of an army as a single integer.
+
+    Ships with identical specs form one type. The code is a mixed-radix number with
+    one digit per type (how many of that type survive) followed by one digit for the
+    sustain damage left, so outcomes can be counted in a dict of ints instead of
+    storing ship names for every fight.
+    """
+    def __init__(self, army: list[Ship]):
+        specs = as_specs(army)
+        self.army_size = len(specs)
+        self.types = list(dict.fromkeys(specs))  # distinct specs in army order
+        type_index = {spec: t for t, spec in enumerate(self.types)}
+        self.slot_type = [type_index[spec] for spec in specs]
+        self.type_size = [self.slot_type.count(t) for t in range(len(self.types))]
+
+        self.type_weight = []
+        weight = 1
+        for size in self.type_size:
+            self.type_weight.append(weight)
+            weight *= size + 1
+        self.sustain_weight = weight
+        self.slot_weight = [self.type_weight[t] for t in self.slot_type]
+        self.full_ships_code = sum(size * weight for size, weight in zip(self.type_size, self.type_weight))
+        self.max_sustain = sum(1 for spec in specs if spec.sustain_damage)
+
+    def encode(self, type_counts, sustain=0) -> int:
+        return sum(int(count) * weight for count, weight in zip(type_counts, self.type_weight)) + int(sustain) * self.sustain_weight
+
+    def decode(self, code: int) -> tuple[list[int], int]:
+        sustain, ships_code = divmod(code, self.sustain_weight)
+        counts = []
+        for size in self.type_size:
+            ships_code, count = divmod(ships_code, size + 1)
+            counts.append(count)
+        return counts, sustain
+
+    def ships_code(self, code: int) -> int:
+        # Code with the sustain digit dropped, i.e. only which ships survived
+        return code % self.sustain_weight
+
+    def names(self, code: int) -> tuple:
+        counts, _ = self.decode(code)
+        return tuple(str(spec.name) for spec, count in zip(self.types, counts) for _ in range(count))
+
+    def is_full(self, code: int) -> bool:
+        return self.ships_code(code) == self.full_ships_code
+
+
+class FightResult:
+    """
+    Outcome counts of a batch of simulated fights.
 
-    # Return the results
-    statistics = f"""
+    ``survivors`` maps each army label to {survivor code: count} (see SurvivorCodec)
+    and ``rounds`` maps the number of combat rounds to how many fights lasted that
+    long, so memory depends on the number of distinct outcomes, not on n_fights.
+    The exact solver stores probabilities instead of counts with n_fights = 1.
+    str() gives the statistics text.
+    """
+    def __init__(self, armies: list[list[Ship]], n_fights=0):
+        # Prebuilt SurvivorCodecs may be passed instead of armies
+        self.codecs = {label: army if isinstance(army, SurvivorCodec) else SurvivorCodec(army)
+                       for label, army in zip(ARMY_LABELS, armies)}
+        self.n_fights = n_fights
+        self.wins = {label: 0 for label in ARMY_LABELS}
+        self.draws = 0
+        self.survivors = {label: {} for label in ARMY_LABELS}
+        self.rounds = {}
+        # PhaseProfile of the run when simulate_fight was called with profile=True
+        self.profile = None
+
+    def add_win(self, label: str, code: int, count=1):
+        self.wins[label] += count
+        self.survivors[label][code] = self.survivors[label].get(code, 0) + count
+
+    def add_rounds(self, rounds: int, count=1):
+        self.rounds[rounds] = self.rounds.get(rounds, 0) + count
+
+    def merge(self, other: "FightResult") -> "FightResult":
+        # Add another result for the same matchup into this one
+        self.n_fights += other.n_fights
+        self.draws += other.draws
+        for label in ARMY_LABELS:
+            self.wins[label] += other.wins[label]
+            for code, count in other.survivors[label].items():
+                self.survivors[label][code] = self.survivors[label].get(code, 0) + count
+        for rounds, count in other.rounds.items():
+            self.add_rounds(rounds, count)
+        if other.profile is not None:
+            self.profile = other.profile if self.profile is None else self.profile.merge(other.profile)
+        return self
+
+    def win_probability(self, label: str) -> float:
+        return self.wins[label] / self.n_fights if self.n_fights else 0.0
+
+    def draw_probability(self) -> float:
+        return self.draws / self.n_fights if self.n_fights else 0.0
+
+    def full_survival(self, label: str):
+        codec = self.codecs[label]
+        return sum(count for code, count in self.survivors[label].items() if codec.is_full(code))
+
+    def survivor_distribution(self, label: str) -> dict[tuple, float]:
+        # Probability of each surviving ship combination given that the army won (sustain left ignored)
+        codec = self.codecs[label]
+        by_ships = Counter()
+        for code, count in self.survivors[label].items():
+            by_ships[codec.ships_code(code)] += count
+        wins = self.wins[label]
+        return {codec.names(code): count / wins for code, count in by_ships.most_common()} if wins else {}
+
+    def expected_survivor_value(self, label: str) -> float:
+        # Mean total cost of the ships this army has left, over all fights (losses count as 0)
+        codec = self.codecs[label]
+        value = 0.0
+        for code, count in self.survivors[label].items():
+            counts, _ = codec.decode(code)
+            value += count * sum(n * spec.cost for spec, n in zip(codec.types, counts))
+        return value / self.n_fights if self.n_fights else 0.0
+
+    def mean_rounds(self) -> float:
+        total = sum(self.rounds.values())
+        return sum(rounds * count for rounds, count in self.rounds.items()) / total if total else 0.0
+
+    def format(self) -> str:
+        lines = {}
+        for label in ARMY_LABELS:
+            distribution = self.survivor_distribution(label)
+            if self.wins[label] > 0 and distribution:
+                names, share = next(iter(distribution.items()))
+                mode_str = " ".join(names)
+                mode_percentage = share * 100
+                full_survival_rate = self.full_survival(label) / self.wins[label] * 100
+            else:
+                mode_str = "N/A (no wins)"
+                mode_percentage = 0.0
+                full_survival_rate = 0
+            lines[label] = (mode_str, mode_percentage, full_survival_rate)
+
+        (army_1_mode_str, army_1_mode_percentage, army_1_full_survival_rate) = lines["Army 1"]
+        (army_2_mode_str, army_2_mode_percentage, army_2_full_survival_rate) = lines["Army 2"]
+
+        # Return the results
+        statistics = f"""
     Fight Simulation Results:
     --------------------------
-    Army 1 Wins Probability: {prob_army_1_win}
-    Army 2 Wins Probability: {prob_army_2_win}
-    Draw Probability: {draw_rate}
+    Army 1 Wins Probability: {self.win_probability("Army 1")}
+    Army 2 Wins Probability: {self.win_probability("Army 2")}
+    Draw Probability: {self.draw_probability()}
 
     Army 1 Most Frequent Remaining Ships: {army_1_mode_str} with {army_1_mode_percentage:.2f}% occurrence
     Army 1 Full Survival Rate: {army_1_full_survival_rate:.2f}%
@@ -103,86 +320,545 @@ def simulate_fight(armies: list[list[Ship]], n_fights=10000):
     Army 2 Full Survival Rate: {army_2_full_survival_rate:.2f}%
 
     """
-    
-    return statistics
+        return statistics
+
+    def to_dict(self, top=5) -> dict:
+        # Plain-data summary (JSON friendly) with the ``top`` most frequent survivor combinations
+        armies = {}
+        for label in ARMY_LABELS:
+            wins = self.wins[label]
+            distribution = list(self.survivor_distribution(label).items())[:top]
+            armies[label] = {
+                "win_probability": self.win_probability(label),
+                "full_survival_rate": self.full_survival(label) / wins if wins else 0.0,
+                "survivors": [{"ships": list(names), "probability": share} for names, share in distribution],
+            }
+        return {
+            "n_fights": self.n_fights,
+            "draw_probability": self.draw_probability(),
+            "mean_rounds": self.mean_rounds() if self.rounds else None,
+            "armies": armies,
+        }
+
+    def __str__(self):
+        return self.format()
+
+
+class PhaseProfile:
+    """
+    Time and call counts per phase of the battle loop, filled in by simulate_fight(profile=True).
 
+    Phases are "setup" (building the per-army state), "reset" (restoring it before each
+    fight), "barrage", "space_cannon", "cannon_removal", "roll_hits" and "assign_damage".
+    ``dice`` counts the dice rolled in combat rounds and ``combat_rounds`` the rounds,
+    so dice per round is their ratio. Times are wall-clock seconds summed over workers.
+    """
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.dice = 0
+        self.combat_rounds = 0
+        self.total_seconds = 0.0
+        self._timed = {}
+
+    def add(self, phase: str, seconds: float, calls=1):
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        self.calls[phase] = self.calls.get(phase, 0) + calls
+
+    def timed(self, phase: str, function):
+        # Wrapper of `function` that books its run time under `phase` (built once per phase)
+        wrapper = self._timed.get(phase)
+        if wrapper is None:
+            def wrapper(*args):
+                start = time.perf_counter()
+                value = function(*args)
+                self.add(phase, time.perf_counter() - start)
+                return value
+            self._timed[phase] = wrapper
+        return wrapper
+
+    def __getstate__(self):
+        # The timing wrappers are closures; workers send back only the numbers
+        state = self.__dict__.copy()
+        state["_timed"] = {}
+        return state
+
+    def merge(self, other: "PhaseProfile") -> "PhaseProfile":
+        for phase, seconds in other.seconds.items():
+            self.add(phase, seconds, other.calls[phase])
+        self.dice += other.dice
+        self.combat_rounds += other.combat_rounds
+        self.total_seconds += other.total_seconds
+        return self
+
+    def mean_dice_per_round(self) -> float:
+        return self.dice / self.combat_rounds if self.combat_rounds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "total_seconds": self.total_seconds,
+            "phases": {
+                phase: {
+                    "calls": self.calls[phase],
+                    "seconds": seconds,
+                    "mean_microseconds": seconds / self.calls[phase] * 1e6,
+                    "share": seconds / self.total_seconds if self.total_seconds else 0.0,
+                }
+                for phase, seconds in self.seconds.items()
+            },
+            "combat_rounds": self.combat_rounds,
+            "mean_dice_per_round": self.mean_dice_per_round(),
+        }
+
+    def format(self) -> str:
+        lines = [f"    {phase:<15} {self.calls[phase]:>10} calls {seconds:>9.4f} s"
+                 f" ({seconds / self.total_seconds * 100 if self.total_seconds else 0:.1f}%)"
+                 for phase, seconds in self.seconds.items()]
+        return f"""
+    Phase Profile:
+    --------------
+{chr(10).join(lines)}
+    Total Time: {self.total_seconds:.4f} s
+    Mean Dice Rolled per Round: {self.mean_dice_per_round():.2f}
+    """
+
+    def __str__(self):
+        return self.format()
 
-# Function to assign damage to ships based on hits (use sustain damage first, then weakest combat ship)
-def assign_damage(army_ships: list[Ship], hits: int):
-    # First, use sustain damage for ships that have it
-    for ship in army_ships:
-        if ship.sustain_damage and hits > 0:
-            ship.sustain_damage = False  # damage as used
-            hits -= 1  # Subtract 1 hit from the totaMark sustain l hits to assign
-        if hits == 0:  # If no hits are left, stop
-            return army_ships
-    
 
-    while hits > 0 and army_ships:  # As long as there are hits and ships left
-        # Remove the ship with the highest combat value (last in sorted list)
-        # Find ship with max combat (worst)
-        worst_ship = max(army_ships, key=lambda x: x.combat)
-        army_ships.remove(worst_ship)
-        hits -= 1
+def write_trace(result: FightResult, path: str):
+    # JSON trace of a profiled run: phase timings plus the rounds-per-fight histogram
+    trace = {
+        "n_fights": result.n_fights,
+        "fleet_sizes": {label: codec.army_size for label, codec in result.codecs.items()},
+        "rounds_histogram": {str(rounds): count for rounds, count in sorted(result.rounds.items())},
+        "mean_rounds": result.mean_rounds(),
+        "profile": result.profile.to_dict() if result.profile is not None else None,
+    }
+    with open(path, "w") as f:
+        json.dump(trace, f, indent=2)
 
 
-    return army_ships # return ships which are left after assigning hits
+class SustainState:
+    # Sustain damage handling shared by ArmyState and GroupState, which both keep the
+    # sustain left and a survivor code
+    __slots__ = ()
 
-def perform_pre_combat_effects(attacking_army: list[Ship], defending_army: list[Ship]) -> list[Ship]:
-    # Collect combat thresholds and number of dice to roll
-    thresholds = []
-    dice_counts = []
+    def use_sustain(self, hits: int) -> int:
+        # Absorb as many hits as sustain damage allows and return the hits left over
+        absorbed = min(hits, self.sustain)
+        self.sustain -= absorbed
+        self.code -= absorbed * self.codec.sustain_weight
+        return hits - absorbed
 
-    for ship in attacking_army:
-        if ship.anti_fighter_barrage:
-            thresholds.extend([ship.anti_fighter_combat] * ship.anti_fighter_hits)
-            dice_counts.append(ship.anti_fighter_hits)
 
-    if thresholds:
-        rolls = np.random.randint(1, 11, size=len(thresholds))
-        thresholds = np.array(thresholds)
-        total_barrage_hits = int(np.sum(rolls >= thresholds))
+class ArmyState(SustainState):
+    """
+    Per-trial combat state of one army, built once per simulate_fight call.
+
+    The ships themselves are immutable ShipSpec objects; a trial only changes the
+    ``alive`` byte array (one entry per ship, army order), the count of sustain damage
+    left and the matching survivor ``code``. reset() restores all three, so no objects
+    are created per fight.
+    """
+    __slots__ = ("specs", "codec", "alive", "alive_count", "sustain", "code", "_full_alive", "_full_sustain",
+                 "die_slot", "removal_order", "next_removal", "fighter_slots", "cannon_slots",
+                 "barrage_slot", "barrage_threshold", "cannon_threshold", "hit_cdfs", "hit_cdf_cache_size")
+
+    def __init__(self, army: list[Ship], removal_policy="combat"):
+        self.specs = tuple(as_specs(army))
+        self.codec = SurvivorCodec(self.specs)
+        size = len(self.specs)
+        self._full_alive = b"\x01" * size
+        self._full_sustain = self.codec.max_sustain
+        self.alive = bytearray(self._full_alive)
+        self.reset()
+
+        # One entry per combat die: the ship that rolls it (the profiler counts dice with it;
+        # combat rounds themselves are sampled from hit_cdf)
+        self.die_slot = np.repeat(np.arange(size), [spec.hits for spec in self.specs])
+
+        # Ships in the order damage removes them; every slot before next_removal is already dead
+        self.removal_order = removal_order(self.specs, removal_policy)
+        self.fighter_slots = [i for i in self.removal_order if self.specs[i].is_fighter]
+        self.cannon_slots = [i for i, spec in enumerate(self.specs) if spec.is_space_cannon]
+
+        barrage = [(i, spec.anti_fighter_combat) for i, spec in enumerate(self.specs)
+                   if spec.anti_fighter_barrage for _ in range(spec.anti_fighter_hits)]
+        self.barrage_slot = np.array([i for i, _ in barrage], dtype=int)
+        self.barrage_threshold = np.array([combat for _, combat in barrage], dtype=np.int8)
+        self.cannon_threshold = np.array([self.specs[i].combat for i in self.cannon_slots], dtype=np.int8)
+
+        # Round hit CDF per set of surviving ships, filled by roll_hits as states come up
+        self.hit_cdfs = OrderedDict()
+        self.hit_cdf_cache_size = HIT_CDF_CACHE_SIZE
+
+    def reset(self):
+        self.alive[:] = self._full_alive
+        self.alive_count = len(self.specs)
+        self.next_removal = 0
+        self.sustain = self._full_sustain
+        self.code = self.codec.full_ships_code + self._full_sustain * self.codec.sustain_weight
+
+    def alive_mask(self) -> np.ndarray:
+        # Zero-copy boolean view of the alive bytes
+        return np.frombuffer(self.alive, dtype=bool)
+
+    def remove(self, slot: int):
+        if self.alive[slot]:
+            self.alive[slot] = 0
+            self.alive_count -= 1
+            self.code -= self.codec.slot_weight[slot]
+
+    def hit_cdf(self) -> list[float]:
+        # CDF of the hits the surviving ships score in one combat round (sustain left does not matter)
+        ships_code = self.code % self.codec.sustain_weight
+        cdf = self.hit_cdfs.get(ships_code)
+        if cdf is not None:
+            self.hit_cdfs.move_to_end(ships_code)
+            return cdf
+
+        counts, _ = self.codec.decode(ships_code)
+        pmf = poisson_binomial_pmf((spec.combat, spec.hits * count) for spec, count in zip(self.codec.types, counts))
+        cdf = np.cumsum(pmf).tolist()
+        cdf[-1] = 1.0  # every uniform draw must land inside the table
+        self.hit_cdfs[ships_code] = cdf
+        if len(self.hit_cdfs) > self.hit_cdf_cache_size:
+            self.hit_cdfs.popitem(last=False)
+        return cdf
+
+    def can_hit(self) -> bool:
+        # Whether the surviving ships can score any hit in a combat round
+        return self.alive_count > 0 and self.hit_cdf()[0] < 1.0
+
+
+def roll_hits(army: ArmyState, dice: DiceBuffer) -> int:
+    # The round's hit count is sampled from the cached CDF of the current fleet state with a
+    # single uniform draw, which has the same distribution as rolling every die
+    if not army.alive_count:
+        return 0
+    return bisect_right(army.hit_cdf(), dice.uniform())
+
+
+# Function to simulate a fight between two armies
+def simulate_fight(armies: list[list[Ship]], n_fights=10000, workers=1, seed=None, profile=False,
+                   trace_path=None, removal_policy="combat") -> FightResult:
+    # With workers > 1 the fights are split over a process pool; results are reproducible
+    # for a given seed and number of workers. str(result) gives the statistics text.
+    # profile=True times every phase into result.profile (see PhaseProfile); trace_path
+    # also writes it, with the rounds histogram, as a JSON trace. removal_policy picks
+    # which ships are lost first (see REMOVAL_POLICIES). Armies given as UnitGroups run
+    # on the count-compressed engine (group_tallies), which cannot be profiled.
+    profile = profile or trace_path is not None
+    if any(is_grouped(army) for army in armies):
+        if profile:
+            raise ValueError("Profiling is not supported for armies given as UnitGroups")
+        tally_function = partial(group_tallies, removal_policy=removal_policy)
+    else:
+        tally_function = partial(fight_tallies, profile=profile, removal_policy=removal_policy)
+    result = run_fight_tallies(tally_function, armies, n_fights, workers=workers, seed=seed)
+    if trace_path is not None:
+        write_trace(result, trace_path)
+    return result
+
+
+# Run n_fights with one random stream and count the outcomes
+def fight_tallies(armies: list[list[Ship]], n_fights: int, seed=None, profile=False,
+                  removal_policy="combat") -> FightResult:
+    start = time.perf_counter()
+    # seed may also be a Generator, which default_rng uses as is
+    dice = DiceBuffer(np.random.default_rng(seed))
+    result = FightResult(armies, n_fights)
+    profile = PhaseProfile() if profile else None
+
+    army_1, army_2 = armies
+    # Immutable specs and reusable state, allocated once for all trials
+    army_1_state = ArmyState(army_1, removal_policy)
+    army_2_state = ArmyState(army_2, removal_policy)
+
+    # Without profiling the plain functions are called, so the loop pays nothing for it
+    reset, roll, damage = ArmyState.reset, roll_hits, assign_damage
+    if profile is not None:
+        profile.add("setup", time.perf_counter() - start, 2)
+        reset = profile.timed("reset", reset)
+        roll = profile.timed("roll_hits", roll)
+        damage = profile.timed("assign_damage", damage)
+
+    for _ in range(n_fights):
+        reset(army_1_state)
+        reset(army_2_state)
+
+        # Apply precombat effects
+        precombat_phase(army_1_state, army_2_state, dice, profile)
+
+        rounds = 0
+        while army_1_state.alive_count and army_2_state.alive_count:
+            if profile is not None:
+                profile.dice += int(np.sum(army_1_state.alive_mask()[army_1_state.die_slot]))
+                profile.dice += int(np.sum(army_2_state.alive_mask()[army_2_state.die_slot]))
+                profile.combat_rounds += 1
+
+            # Roll a die for each ship and assign hits to the opposing army
+            army_1_hits = roll(army_1_state, dice)
+            army_2_hits = roll(army_2_state, dice)
+
+            # Assign damage to the opposing army (first use sustain damage, then ships in removal-policy order)
+            damage(army_2_state, army_1_hits)
+            damage(army_1_state, army_2_hits)
+            rounds += 1
+            if not (army_1_hits or army_2_hits or army_1_state.can_hit() or army_2_state.can_hit()):
+                break  # neither side can ever hit again: a draw
+
+        # Check who won and log the result
+        result.add_rounds(rounds)
+        if army_1_state.alive_count and not army_2_state.alive_count:
+            result.add_win("Army 1", army_1_state.code)
+        elif army_2_state.alive_count and not army_1_state.alive_count:
+            result.add_win("Army 2", army_2_state.code)
+        else:
+            result.draws += 1
+
+    if profile is not None:
+        profile.total_seconds = time.perf_counter() - start
+        result.profile = profile
+    return result
+
+
+def split_fights(n_fights: int, workers: int) -> list[int]:
+    # Spread n_fights as evenly as possible, earlier workers take the remainder
+    base, extra = divmod(n_fights, workers)
+    return [base + (1 if i < extra else 0) for i in range(workers)]
+
+
+def run_fight_tallies(tally_function, armies: list[list[Ship]], n_fights: int, workers=1, seed=None) -> FightResult:
+    """
+    Run ``tally_function(armies, n_fights, seed_sequence)`` on one or more processes.
+
+    ``seed`` may be an int, a np.random.SeedSequence, a np.random.Generator (used
+    directly by a single worker) or None (fresh entropy). Each worker receives its own
+    child stream (see spawn_streams) and the per-worker results are merged in worker
+    order, so a given seed and worker count always give the same result.
+    """
+    if workers <= 1:
+        single = seed if isinstance(seed, (np.random.SeedSequence, np.random.Generator)) else np.random.SeedSequence(seed)
+        return tally_function(armies, n_fights, single)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(tally_function, repeat(armies), split_fights(n_fights, workers),
+                              spawn_streams(seed, workers)))
+    result = FightResult(armies)
+    for part in parts:
+        result.merge(part)
+    return result
+
+
+# Function to assign damage to ships based on hits (use sustain damage first, then ships in removal-policy order)
+def assign_damage(army: ArmyState, hits: int) -> ArmyState:
+    # First, use sustain damage
+    hits = army.use_sustain(hits)
+
+    # Then remove ships in removal order. Ships are only ever lost, so the walk resumes
+    # where the last one stopped and k hits cost O(k) plus the ships lost outside combat
+    order = army.removal_order
+    position = army.next_removal
+    while hits and army.alive_count:
+        slot = order[position]
+        position += 1
+        if army.alive[slot]:
+            army.remove(slot)
+            hits -= 1
+    army.next_removal = position
+
+    return army
+
+def perform_pre_combat_effects(attacking_army: ArmyState, defending_army: ArmyState,
+                               dice: DiceBuffer) -> ArmyState:
+    # Anti-fighter barrage of every surviving ship that has it
+    if attacking_army.barrage_threshold.size:
+        rolls = dice.roll(attacking_army.barrage_threshold.size)
+        alive_dice = attacking_army.alive_mask()[attacking_army.barrage_slot]
+        total_barrage_hits = int(np.sum((rolls >= attacking_army.barrage_threshold) & alive_dice))
     else:
         total_barrage_hits = 0
 
     # Apply hits to defending fighters
-    new_defenders = []
     fighter_hits_left = total_barrage_hits
-    for ship in defending_army:
-        if fighter_hits_left > 0 and isinstance(ship, DefaultFighter):
+    for slot in defending_army.fighter_slots:
+        if fighter_hits_left == 0:
+            break
+        if defending_army.alive[slot]:
+            defending_army.remove(slot)
             fighter_hits_left -= 1
-            continue  # Remove fighter
-        new_defenders.append(ship)
 
-    return new_defenders
+    return defending_army
 
-def perform_space_cannon_fire(army_with_cannon: list[Ship], target_army: list[Ship]) -> list[Ship]:
+def perform_space_cannon_fire(army_with_cannon: ArmyState, target_army: ArmyState,
+                              dice: DiceBuffer) -> ArmyState:
+    # One die per surviving space cannon
     hits = 0
-    for ship in army_with_cannon:
-        if isinstance(ship, SpaceCannon):
-            
-            if random.randint(1, 10) >= ship.combat:
-                hits += 1
+    if army_with_cannon.cannon_slots:
+        rolls = dice.roll(len(army_with_cannon.cannon_slots))
+        alive = army_with_cannon.alive_mask()[army_with_cannon.cannon_slots]
+        hits = int(np.sum((rolls >= army_with_cannon.cannon_threshold) & alive))
     return assign_damage(target_army, hits)
 
-def prepare_army_for_combat(army: list[Ship]) -> list[Ship]:
-    return [ship for ship in army if not isinstance(ship, SpaceCannon)]
+def prepare_army_for_combat(army: ArmyState) -> ArmyState:
+    for slot in army.cannon_slots:
+        army.remove(slot)
+    return army
+
+def precombat_phase(army1: ArmyState, army2: ArmyState, dice: DiceBuffer, profile: PhaseProfile = None):
+    barrage, cannon_fire, remove_cannons = perform_pre_combat_effects, perform_space_cannon_fire, prepare_army_for_combat
+    if profile is not None:
+        barrage = profile.timed("barrage", barrage)
+        cannon_fire = profile.timed("space_cannon", cannon_fire)
+        remove_cannons = profile.timed("cannon_removal", remove_cannons)
 
-def precombat_phase(army1: list[Ship], army2: list[Ship]):
     # Apply anti-fighter barrage
-    army2 = perform_pre_combat_effects(army1, army2)
-    army1 = perform_pre_combat_effects(army2, army1)
+    barrage(army1, army2, dice)
+    barrage(army2, army1, dice)
 
     # Apply space cannon fire
-    army2 = perform_space_cannon_fire(army1, army2)
-    army1 = perform_space_cannon_fire(army2, army1)
+    cannon_fire(army1, army2, dice)
+    cannon_fire(army2, army1, dice)
 
     # Remove space cannons from combat
-    army1 = prepare_army_for_combat(army1)
-    army2 = prepare_army_for_combat(army2)
+    remove_cannons(army1)
+    remove_cannons(army2)
 
     return army1, army2
 
+
+class GroupState(SustainState):
+    """
+    Per-trial combat state of an army in count-compressed form (see UnitGroup).
+
+    ``counts`` holds how many units of every group are left. A round rolls one binomial
+    per group and hits are taken off the counts, so a round costs O(number of groups)
+    whatever the number of units. Counts are plain lists: with a handful of groups,
+    scalar binomial draws are cheaper than one numpy call. Survivor codes are the ones
+    ArmyState would give for the expanded army, so both forms report the same FightResult.
+    """
+    __slots__ = ("groups", "codec", "counts", "alive_count", "sustain", "code", "_full_counts", "_full_sustain",
+                 "group_weight", "combat_dice", "removal_order", "next_removal", "fighter_groups", "cannon_dice",
+                 "barrage_dice")
+
+    def __init__(self, army: list[Ship], removal_policy="combat"):
+        if removal_policy not in REMOVAL_POLICIES:
+            raise ValueError(f"Unknown removal policy: {removal_policy}")
+        self.groups = to_groups(army)
+        self.codec = SurvivorCodec(self.groups)
+        type_index = {spec: t for t, spec in enumerate(self.codec.types)}
+        self.group_weight = [self.codec.type_weight[type_index[group.spec]] for group in self.groups]
+        self._full_counts = [group.count for group in self.groups]
+        self._full_sustain = self.codec.max_sustain
+        self.reset()
+
+        # (group, dice per unit, chance to hit) of every group that rolls combat dice
+        specs = [group.spec for group in self.groups]
+        self.combat_dice = [(g, spec.hits, _hit_chance(spec.combat)) for g, spec in enumerate(specs) if spec.hits]
+
+        # Groups are runs of identical units, so sorting them gives the slot removal order
+        key = REMOVAL_POLICIES[removal_policy]
+        self.removal_order = sorted(range(len(specs)), key=lambda g: key(specs[g]))
+        self.fighter_groups = [g for g in self.removal_order if specs[g].is_fighter]
+        self.cannon_dice = [(g, 1, _hit_chance(spec.combat)) for g, spec in enumerate(specs) if spec.is_space_cannon]
+        self.barrage_dice = [(g, spec.anti_fighter_hits, _hit_chance(spec.anti_fighter_combat))
+                             for g, spec in enumerate(specs) if spec.anti_fighter_barrage]
+
+    def reset(self):
+        self.counts = self._full_counts.copy()
+        self.alive_count = sum(self._full_counts)
+        self.next_removal = 0
+        self.sustain = self._full_sustain
+        self.code = self.codec.full_ships_code + self._full_sustain * self.codec.sustain_weight
+
+    def remove(self, group: int, n: int):
+        n = min(n, self.counts[group])
+        self.counts[group] -= n
+        self.alive_count -= n
+        self.code -= n * self.group_weight[group]
+
+    def can_hit(self) -> bool:
+        return any(self.counts[g] and p_hit > 0 for g, _, p_hit in self.combat_dice)
+
+
+def group_roll_hits(army: GroupState, rng: np.random.Generator, dice=None) -> int:
+    # One binomial draw per surviving group: count * dice per unit, each hitting with the
+    # group's chance (dice defaults to the combat dice; barrage and space cannons pass theirs)
+    binomial, counts = rng.binomial, army.counts
+    return sum([binomial(counts[g] * n_dice, p_hit) for g, n_dice, p_hit in
+                (army.combat_dice if dice is None else dice) if counts[g]])
+
+
+def assign_group_damage(army: GroupState, hits: int) -> GroupState:
+    # Same rule as assign_damage, but whole counts are taken off a group at a time
+    hits = army.use_sustain(hits)
+    order = army.removal_order
+    position = army.next_removal
+    while hits and army.alive_count:
+        group = order[position]
+        lost = min(hits, army.counts[group])
+        army.remove(group, lost)
+        hits -= lost
+        if not army.counts[group]:
+            position += 1
+    army.next_removal = position
+    return army
+
+
+def group_precombat_phase(army1: GroupState, army2: GroupState, rng: np.random.Generator):
+    # precombat_phase for count-compressed armies, in the same order
+    for attacker, defender in ((army1, army2), (army2, army1)):
+        hits = group_roll_hits(attacker, rng, attacker.barrage_dice)
+        for group in defender.fighter_groups:
+            if not hits:
+                break
+            lost = min(hits, defender.counts[group])
+            defender.remove(group, lost)
+            hits -= lost
+
+    for attacker, defender in ((army1, army2), (army2, army1)):
+        assign_group_damage(defender, group_roll_hits(attacker, rng, attacker.cannon_dice))
+
+    for army in (army1, army2):
+        for group, _, _ in army.cannon_dice:
+            army.remove(group, army.counts[group])
+    return army1, army2
+
+
+# Run n_fights of count-compressed armies with one random stream and count the outcomes
+def group_tallies(armies: list[list[Ship]], n_fights: int, seed=None, removal_policy="combat") -> FightResult:
+    rng = np.random.default_rng(seed)
+    army_1_state = GroupState(armies[0], removal_policy)
+    army_2_state = GroupState(armies[1], removal_policy)
+    result = FightResult([army_1_state.codec, army_2_state.codec], n_fights)
+
+    for _ in range(n_fights):
+        army_1_state.reset()
+        army_2_state.reset()
+        group_precombat_phase(army_1_state, army_2_state, rng)
+
+        rounds = 0
+        while army_1_state.alive_count and army_2_state.alive_count:
+            army_1_hits = group_roll_hits(army_1_state, rng)
+            army_2_hits = group_roll_hits(army_2_state, rng)
+            assign_group_damage(army_2_state, army_1_hits)
+            assign_group_damage(army_1_state, army_2_hits)
+            rounds += 1
+            if not (army_1_hits or army_2_hits or army_1_state.can_hit() or army_2_state.can_hit()):
+                break  # neither side can ever hit again: a draw
+
+        result.add_rounds(rounds)
+        if army_1_state.alive_count and not army_2_state.alive_count:
+            result.add_win("Army 1", army_1_state.code)
+        elif army_2_state.alive_count and not army_1_state.alive_count:
+            result.add_win("Army 2", army_2_state.code)
+        else:
+            result.draws += 1
+    return result
+
+
 # Example usage:
 if __name__ == "__main__":
     # Example: Creating a simple army with ships
@@ -192,3 +868,12 @@ if __name__ == "__main__":
     # Simulate the fight between two armies
     result = simulate_fight([army_1, army_2], n_fights=10000)
     print(result)
+
+    # Large fleets can be given count-compressed, one UnitGroup per unit type
+    swarm = [UnitGroup.of(DefaultCarrier(), 25), UnitGroup.of(DefaultFighter(), 100)]
+    result = simulate_fight([swarm, [UnitGroup.of(DefaultDreadnought(), 12)]], n_fights=10000)
+    print(result)
+
+    # Same fight spread over four processes, reproducible through the seed
+    result = simulate_fight([army_1, army_2], n_fights=100000, workers=4, seed=42)
+    print(result)
@@ -0,0 +1,202 @@
+from Ships import *  # assuming Ships module is present with the Default classes
+import numpy as np
+from fight_simulation import _hit_chance
+from result_cache import ResultCache, cached_simulate_fight
+
+# Unit types the optimizer may buy (fighters last: they need capacity from the others)
+BUYABLE_CLASSES = [DefaultWarSun, DefaultDreadnought, DefaultFlagship, DefaultCruiser, DefaultCarrier,
+                   DefaultDestroyer, DefaultFighter]
+
+# Physical unit limits of the game, which also bound the search
+DEFAULT_UNIT_LIMITS = {
+    DefaultWarSun: 2, DefaultDreadnought: 5, DefaultFlagship: 1, DefaultCruiser: 8,
+    DefaultCarrier: 4, DefaultDestroyer: 8, DefaultFighter: 10,
+}
+
+
+class UnitOption:
+    # One buyable unit: a Default class, upgraded or not, with its per-unit moments
+    def __init__(self, ship_class, upgraded: bool):
+        self.ship_class = ship_class
+        self.upgraded = upgraded
+        ship = self.make()
+        self.name = ship.name
+        self.cost = ship.cost
+        self.capacity = ship.capacity
+        self.is_fighter = ship.is_fighter
+        # Expected hits per round and number of hits the unit can absorb
+        self.mean_hits = ship.hits * _hit_chance(ship.combat)
+        self.health = 2 if ship.sustain_damage else 1
+
+    def make(self) -> Ship:
+        ship = self.ship_class()
+        if self.upgraded:
+            ship.upgrade(1)
+        return ship
+
+
+# Ship stats where lower is better and where higher is better, for comparing variants
+LOWER_IS_BETTER = ("combat", "cost", "anti_fighter_combat", "bombardment_combat")
+HIGHER_IS_BETTER = ("hits", "move", "capacity", "sustain_damage", "anti_fighter_barrage", "anti_fighter_hits",
+                    "bombardment", "bombardment_hits")
+
+
+def dominates(better: Ship, worse: Ship) -> bool:
+    # At least as good in every stat (equal stats count too)
+    return (all(getattr(better, stat) <= getattr(worse, stat) for stat in LOWER_IS_BETTER)
+            and all(getattr(better, stat) >= getattr(worse, stat) for stat in HIGHER_IS_BETTER))
+
+
+def unit_options(classes=None, drop_dominated=True, upgrades=None) -> list[list[UnitOption]]:
+    """
+    Per class, the variants to choose from (the upgraded one only if the class defines an upgrade).
+
+    ``upgrades`` holds the classes whose unit upgrade the player has researched: those
+    are offered upgraded only, every other class unupgraded only. None offers both
+    variants of every class, as if any upgrade could be had for free.
+
+    With ``drop_dominated`` a variant is left out when another variant of the class is
+    at least as good in every stat at no higher cost, e.g. Fighter I next to Fighter II,
+    so the search does not evaluate the same fight twice under two names.
+    """
+    options = []
+    for ship_class in BUYABLE_CLASSES if classes is None else classes:
+        upgradable = ship_class.upgrade is not Ship.upgrade
+        if upgrades is None:
+            variants = [UnitOption(ship_class, False)] + ([UnitOption(ship_class, True)] if upgradable else [])
+        else:
+            variants = [UnitOption(ship_class, upgradable and ship_class in upgrades)]
+        if drop_dominated:
+            variants = _undominated(variants)
+        options.append(variants)
+    return options
+
+
+def _undominated(variants: list[UnitOption]) -> list[UnitOption]:
+    # Of two equal variants the later (upgraded) one is kept
+    ships = [variant.make() for variant in variants]
+
+    def dominated(v):
+        return any(dominates(other, ships[v]) and (w > v or not dominates(ships[v], other))
+                   for w, other in enumerate(ships) if w != v)
+    return [variant for v, variant in enumerate(variants) if not dominated(v)]
+
+
+class FleetCandidate:
+    def __init__(self, options: list[UnitOption], counts, score: float):
+        self.options = options
+        self.counts = [int(count) for count in counts]
+        self.cost = sum(option.cost * count for option, count in zip(options, self.counts))
+        self.score = score
+        self.win_probability = None
+        self.survivor_value = None
+
+    def ships(self) -> list[Ship]:
+        return [option.make() for option, count in zip(self.options, self.counts) for _ in range(count)]
+
+    def __str__(self):
+        units = ", ".join(f"{count}x {option.name}" for option, count in zip(self.options, self.counts) if count)
+        return (f"{units} | cost {self.cost:g} | win {self.win_probability:.4f}"
+                f" | surviving value {self.survivor_value:.2f} | heuristic score {self.score:.3f}")
+
+
+def enumerate_fleets(options: list[list[UnitOption]], budget: float, max_ships: int,
+                     unit_limits: dict = None) -> np.ndarray:
+    """
+    Every composition within the budget, as a (compositions x variants) count matrix.
+
+    A class is bought either upgraded or not, never both. Non-fighter ships count
+    against ``max_ships`` (fleet supply); fighters must fit in the fleet's capacity.
+    """
+    unit_limits = DEFAULT_UNIT_LIMITS if unit_limits is None else unit_limits
+    offsets = np.cumsum([0] + [len(variants) for variants in options])
+    compositions = []
+    counts = [0] * offsets[-1]
+
+    def search(class_index, budget_left, ships_left, capacity):
+        if class_index == len(options):
+            if any(counts):
+                compositions.append(tuple(counts))
+            return
+        variants = options[class_index]
+        search(class_index + 1, budget_left, ships_left, capacity)
+        for v, option in enumerate(variants):
+            limit = unit_limits.get(option.ship_class, max_ships)
+            limit = min(limit, capacity) if option.is_fighter else min(limit, ships_left)
+            if option.cost > 0:
+                limit = min(limit, int(budget_left // option.cost))
+            slot = offsets[class_index] + v
+            for count in range(1, limit + 1):
+                counts[slot] = count
+                search(class_index + 1, budget_left - count * option.cost,
+                       ships_left - (0 if option.is_fighter else count), capacity + count * option.capacity)
+            counts[slot] = 0
+
+    search(0, budget, max_ships, 0)
+    return np.array(compositions, dtype=np.int64).reshape(-1, offsets[-1])
+
+
+def army_strength(mean_hits, health):
+    # Lanchester square law: fighting strength grows with firepower times staying power.
+    # A heuristic for ranking, not a bound on the win probability
+    return mean_hits * health
+
+
+def optimize_fleet(enemy: list[Ship], budget: float, max_ships=8, objective="win", shortlist=40, top=10,
+                   engine="exact", n_fights=10000, seed=None, unit_limits: dict = None, classes=None,
+                   upgrades=(), cache: ResultCache = None) -> list[FleetCandidate]:
+    """
+    Best fleets to send against ``enemy`` for a given resource budget.
+
+    All compositions within the budget, ``max_ships`` and unit limits get a heuristic
+    score at once (Lanchester strength share from expected hits per round and health
+    of both fleets); only the ``shortlist`` best scored go through the full fight
+    engine, whose results are cached. The score is not a bound, so a composition
+    outside the shortlist can still do better: widen ``shortlist`` to search deeper.
+    ``objective`` is "win" (win probability) or "value" (expected cost of the surviving
+    ships). ``upgrades`` lists the classes with a researched unit upgrade (none by
+    default; see unit_options). Returns the ``top`` candidates, best first.
+    """
+    if objective not in ("win", "value"):
+        raise ValueError(f"Unknown objective: {objective}")
+    options = unit_options(classes, upgrades=upgrades)
+    flat_options = [option for variants in options for option in variants]
+    compositions = enumerate_fleets(options, budget, max_ships, unit_limits)
+    if len(compositions) == 0:
+        return []
+
+    mean_hits = np.array([option.mean_hits for option in flat_options])
+    health = np.array([option.health for option in flat_options])
+    own = army_strength(compositions @ mean_hits, compositions @ health)
+    enemy_strength = army_strength(
+        sum(ship.hits * _hit_chance(ship.combat) for ship in enemy),
+        len(enemy) + sum(1 for ship in enemy if ship.sustain_damage),
+    )
+    scores = own / (own + enemy_strength)
+
+    # Only the most promising compositions are worth a full evaluation
+    keep = np.argsort(-scores, kind="stable")[:shortlist]
+    candidates = []
+    for index in keep:
+        candidate = FleetCandidate(flat_options, compositions[index], float(scores[index]))
+        result = cached_simulate_fight([candidate.ships(), enemy], engine=engine, n_fights=n_fights,
+                                       seed=seed, cache=cache)
+        candidate.win_probability = result.win_probability("Army 1")
+        candidate.survivor_value = result.expected_survivor_value("Army 1")
+        candidates.append(candidate)
+
+    key = (lambda c: c.win_probability) if objective == "win" else (lambda c: c.survivor_value)
+    candidates.sort(key=key, reverse=True)
+    return candidates[:top]
+
+
+if __name__ == "__main__":
+    enemy = [DefaultDreadnought(), DefaultDreadnought(), DefaultCruiser(), DefaultCarrier(),
+             DefaultFighter(), DefaultFighter()]
+
+    for candidate in optimize_fleet(enemy, budget=14, max_ships=5):
+        print(candidate)
+
+    # With cruiser and fighter upgrades researched
+    for candidate in optimize_fleet(enemy, budget=14, max_ships=5, upgrades={DefaultCruiser, DefaultFighter}, top=3):
+        print(candidate)
@@ -0,0 +1,115 @@
+from Ships import *  # assuming Ships module is present with the Default classes
+from collections import Counter
+from fight_simulation import FightResult, poisson_binomial_pmf
+from exact_simulation import ExactArmy, solve_combat
+from result_cache import ResultCache, cached_simulate_fight
+
+
+class InvasionResult:
+    """
+    Outcome of a full invasion: space combat, bombardment, then ground combat.
+
+    ``space`` is the space combat FightResult. ``bombardment`` maps the number of
+    bombardment hits to its probability (over all fights, including lost ones), and
+    ``ground_survivors`` maps the attacker's surviving ground forces to their probability
+    given that the planet was captured.
+    """
+    def __init__(self, space: FightResult):
+        self.space = space
+        self.capture_probability = 0.0
+        self.bombardment = Counter()
+        self.ground_survivors = Counter()
+
+    def space_win_probability(self) -> float:
+        return self.space.win_probability("Army 1")
+
+    def format(self) -> str:
+        if self.ground_survivors:
+            names, share = self.ground_survivors.most_common(1)[0]
+            mode_str = " ".join(names)
+            mode_percentage = share / self.capture_probability * 100
+        else:
+            mode_str, mode_percentage = "N/A (no captures)", 0.0
+        bombardment = ", ".join(f"{hits}: {p:.4f}" for hits, p in sorted(self.bombardment.items()))
+        return f"""
+    Invasion Simulation Results:
+    --------------------------
+    Space Combat Won: {self.space_win_probability()}
+    Bombardment Hits Distribution: {bombardment}
+    Planet Captured: {self.capture_probability}
+
+    Most Frequent Remaining Ground Forces: {mode_str} with {mode_percentage:.2f}% occurrence
+
+    """
+
+    def __str__(self):
+        return self.format()
+
+
+def simulate_invasion(fleet: list[Ship], ground_forces: list[Ship], defender_fleet: list[Ship],
+                      defender_ground_forces: list[Ship], engine="exact", n_fights=10000, seed=None,
+                      removal_policy="keep_transports", cache: ResultCache = None) -> InvasionResult:
+    """
+    Invade a planet: space combat, bombardment by the surviving ships, then ground combat.
+
+    The space combat runs once through cached_simulate_fight (any engine). Its survivor
+    distribution is then streamed through the later stages: each surviving fleet state
+    gives the bombardment dice and the capacity that limits how many ``ground_forces``
+    (in list order) land. Ground combat is solved exactly, once per (forces landed,
+    bombardment hits) pair, so the later stages add almost nothing to the space engine.
+    A lost or drawn space combat means no invasion. The default removal policy loses
+    ships with capacity last, since they carry the ground forces.
+    """
+    space = cached_simulate_fight([fleet, defender_fleet], engine=engine, n_fights=n_fights, seed=seed,
+                                  cache=cache, removal_policy=removal_policy)
+    result = InvasionResult(space)
+    codec = space.codecs["Army 1"]
+    defenders = ExactArmy(defender_ground_forces, removal_policy)
+    ground_outcomes = {}
+
+    for code, count in space.survivors["Army 1"].items():
+        p_state = count / space.n_fights
+        type_counts, _ = codec.decode(code)
+        survivors = [(spec, n) for spec, n in zip(codec.types, type_counts) if n]
+
+        # Bombardment: every surviving ship with it rolls its bombardment dice
+        bombardment_pmf = poisson_binomial_pmf((spec.bombardment_combat, spec.bombardment_hits * n)
+                                               for spec, n in survivors if spec.bombardment)
+        landed = min(len(ground_forces), sum(spec.capacity * n for spec, n in survivors))
+
+        for hits, p_hits in enumerate(bombardment_pmf):
+            if p_hits <= 0:
+                continue
+            result.bombardment[hits] += p_state * p_hits
+            key = (landed, min(hits, len(defender_ground_forces) + defenders.sustain))
+            if key not in ground_outcomes:
+                ground_outcomes[key] = _ground_combat(ground_forces[:landed], defenders, key[1], removal_policy)
+            for names, p_capture in ground_outcomes[key].items():
+                result.ground_survivors[names] += p_state * p_hits * p_capture
+                result.capture_probability += p_state * p_hits * p_capture
+
+    # Lost space combats bombard nothing
+    result.bombardment[0] += 1.0 - space.win_probability("Army 1")
+    return result
+
+
+def _ground_combat(landed: list[Ship], defenders: ExactArmy, bombardment_hits: int, removal_policy: str) -> dict:
+    # Capture probability per surviving attacker ground force combination
+    if not landed:
+        return {}
+    attackers = ExactArmy(landed, removal_policy)
+    defender_state = defenders.take_damage(defenders.start_state(), bombardment_hits)
+    wins, _, _ = solve_combat(attackers, defenders, attackers.start_state(), defender_state)
+    captures = Counter()
+    for (slots, _), p_win in wins.items():
+        captures[tuple(str(landed[i].name) for i in slots)] += p_win
+    return captures
+
+
+if __name__ == "__main__":
+    fleet = [DefaultDreadnought(), DefaultDreadnought(), DefaultCarrier(), DefaultCruiser()]
+    ground_forces = [DefaultInfantry() for _ in range(4)]
+    defender_fleet = [DefaultCruiser(), DefaultDestroyer()]
+    defender_ground_forces = [DefaultInfantry(), DefaultInfantry(), DefaultMech()]
+
+    print(simulate_invasion(fleet, ground_forces, defender_fleet, defender_ground_forces))
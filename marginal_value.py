@@ -0,0 +1,107 @@
+from Ships import *  # assuming Ships module is present with the Default classes
+from exact_simulation import ExactArmy, solve_exact
+from fleet_optimizer import UnitOption, unit_options
+from variant_comparison import compare_variants
+
+
+class PurchaseValue:
+    # Win probability gained by adding one unit to the fleet
+    def __init__(self, option: UnitOption, win_probability: float, delta: float, error: float, fits: bool):
+        self.option = option
+        self.win_probability = win_probability
+        self.delta = delta
+        self.error = error
+        self.fits = fits
+
+    @property
+    def per_cost(self) -> float:
+        return self.delta / self.option.cost if self.option.cost else float("inf")
+
+
+class PurchaseRanking:
+    """
+    Units ranked by win probability added per unit of cost ("best next purchase").
+
+    ``error`` of an entry is the standard error of its delta (0 for the exact engine).
+    Fighters that would not fit in the fleet's capacity are listed after every unit that
+    can be bought, and marked. ``cancelled`` is set when the run was stopped early; the
+    ranking then only holds the units evaluated so far.
+    """
+    def __init__(self, base_win_probability: float, values: list[PurchaseValue], engine: str, cancelled=False):
+        self.base_win_probability = base_win_probability
+        self.values = sorted(values, key=lambda value: (value.fits, value.per_cost), reverse=True)
+        self.engine = engine
+        self.cancelled = cancelled
+
+    def format(self) -> str:
+        lines = []
+        for rank, value in enumerate(self.values, start=1):
+            error = f" ± {value.error * 100:.2f}" if value.error else ""
+            note = "" if value.fits else " (needs capacity)"
+            lines.append(f"    {rank:>2}. {value.option.name:<16} cost {value.option.cost:<4g}"
+                         f" {value.delta * 100:+.2f}%{error} win -> {value.per_cost * 100:+.2f}% per resource{note}")
+        cancelled = ", cancelled" if self.cancelled else ""
+        return f"""
+    Best Next Purchase ({self.engine}{cancelled}):
+    --------------------------
+    Current Win Probability: {self.base_win_probability:.4f}
+{chr(10).join(lines)}
+    """
+
+    def __str__(self):
+        return self.format()
+
+
+def _fits(army: list[Ship], option: UnitOption) -> bool:
+    if not option.is_fighter:
+        return True
+    fighters = sum(1 for ship in army if ship.is_fighter)
+    return fighters < sum(ship.capacity for ship in army)
+
+
+def marginal_values(army: list[Ship], opponent: list[Ship], engine="exact", n_fights=20000, seed=None,
+                    options: list[UnitOption] = None, removal_policy="combat", progress=None) -> PurchaseRanking:
+    """
+    Win probability each one-unit addition to ``army`` gains against ``opponent``, per cost.
+
+    All variants are evaluated together against shared work: with the exact engine the
+    opponent is prepared once and its round PMF table is reused by every variant; with
+    "crn" the variants run through compare_variants on common random numbers, so the
+    deltas are paired differences with small standard errors.
+
+    ``progress`` is called with the fraction of units evaluated after each exact solve;
+    returning False from it stops the run, which returns the units ranked so far with
+    ``cancelled`` set. The crn engine runs all variants at once and does not call it.
+    """
+    options = [option for variants in unit_options(drop_dominated=False) for option in variants] if options is None else options
+    variants = [list(army) + [option.make()] for option in options]
+
+    if engine == "exact":
+        opponent_army = ExactArmy(opponent, removal_policy)
+        base = solve_exact(ExactArmy(army, removal_policy), opponent_army).win_probability("Army 1")
+        values = []
+        for done, (option, variant) in enumerate(zip(options, variants), start=1):
+            win = solve_exact(ExactArmy(variant, removal_policy), opponent_army).win_probability("Army 1")
+            values.append(PurchaseValue(option, win, win - base, 0.0, _fits(army, option)))
+            if progress is not None and progress(done / len(options)) is False:
+                return PurchaseRanking(float(base), values, engine, cancelled=True)
+    elif engine == "crn":
+        names = ["Current"] + [option.name for option in options]
+        comparison = compare_variants([list(army)] + variants, opponent, n_fights=n_fights, seed=seed,
+                                      names=names, removal_policy=removal_policy)
+        base = comparison.win_probability[0]
+        values = []
+        for v, option in enumerate(options, start=1):
+            delta, error = comparison.differences[names[v]]
+            values.append(PurchaseValue(option, comparison.win_probability[v], delta, error, _fits(army, option)))
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+
+    return PurchaseRanking(float(base), values, engine)
+
+
+if __name__ == "__main__":
+    army = [DefaultDreadnought(), DefaultCruiser(), DefaultCarrier(), DefaultFighter(), DefaultFighter()]
+    opponent = [DefaultDreadnought(), DefaultDreadnought(), DefaultCruiser(), DefaultDestroyer()]
+
+    print(marginal_values(army, opponent))
@@ -0,0 +1,141 @@
+"""
+All-pairs matchup matrix: every fleet of a list against every other one.
+
+    python matchup_matrix.py fleets.json --engine exact --workers 8 --csv matrix.csv
+
+where fleets.json maps fleet names to ship lists in the batch_runner format.
+"""
+from Ships import *  # assuming Ships module is present with the Default classes
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import csv
+import json
+import numpy as np
+from vectorized_simulation import BatchArmy, batch_army_tallies
+from exact_simulation import ExactArmy, solve_exact
+from fight_simulation import spawn_streams
+
+ENGINES = ("vectorized", "exact")
+
+# Fleets prepared once per worker process by _init_worker
+_prepared = None
+
+
+def prepare_fleets(fleets: list[list[Ship]], engine: str) -> list:
+    # Per-fleet precomputation shared by all of its matchups: dice thresholds, removal
+    # order, barrage and space cannon profiles (and for the exact engine the round PMFs)
+    if engine == "vectorized":
+        return [BatchArmy(fleet) for fleet in fleets]
+    if engine == "exact":
+        return [ExactArmy(fleet) for fleet in fleets]
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def _init_worker(fleets: list[list[Ship]], engine: str):
+    global _prepared
+    _prepared = prepare_fleets(fleets, engine)
+
+
+def _matrix_row(task) -> list[tuple[float, float, float]]:
+    # Win, draw and loss probability of fleet i (as army 1) against every fleet
+    i, engine, n_fights, row_seeds = task
+    row = []
+    for j, opponent in enumerate(_prepared):
+        if engine == "exact":
+            result = solve_exact(_prepared[i], opponent)
+        else:
+            result = batch_army_tallies(_prepared[i], opponent, n_fights, row_seeds[j])
+        row.append((result.win_probability("Army 1"), result.draw_probability(), result.win_probability("Army 2")))
+    return row
+
+
+class MatchupMatrix:
+    """
+    Results of every fleet (row, attacking as army 1) against every fleet (column).
+
+    ``win``, ``draw`` and ``loss`` are N x N arrays of probabilities; ``loss[i, j]``
+    is the probability that fleet j wins when fleet i attacks it.
+    """
+    def __init__(self, names: list[str], win: np.ndarray, draw: np.ndarray, loss: np.ndarray):
+        self.names = names
+        self.win = win
+        self.draw = draw
+        self.loss = loss
+
+    def mean_win_rate(self) -> np.ndarray:
+        # Average win probability of each fleet over all opponents, as attacker
+        return self.win.mean(axis=1)
+
+    def format(self) -> str:
+        width = max([len(name) for name in self.names] + [6])
+        header = " " * width + " " + " ".join(f"{name[:width]:>{width}}" for name in self.names)
+        lines = [header]
+        for name, row in zip(self.names, self.win):
+            lines.append(f"{name:<{width}} " + " ".join(f"{p:>{width}.3f}" for p in row))
+        return "\n".join(lines) + "\n"
+
+    def __str__(self):
+        return self.format()
+
+    def write_csv(self, path: str):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["attacker", "defender", "win", "draw", "loss"])
+            for i, attacker in enumerate(self.names):
+                for j, defender in enumerate(self.names):
+                    writer.writerow([attacker, defender, self.win[i, j], self.draw[i, j], self.loss[i, j]])
+
+
+def matchup_matrix(fleets: list[list[Ship]], names: list[str] = None, engine="vectorized", n_fights=10000,
+                   workers=1, seed=None) -> MatchupMatrix:
+    """
+    N x N win/draw/loss matrix for a list of fleets.
+
+    Each fleet is prepared once (per worker process) and reused for all of its 2N
+    matchups instead of being rebuilt by N^2 separate simulate_fight calls. Rows are
+    spread over ``workers`` processes. Every pair gets its own child of ``seed``, so
+    the matrix does not depend on the number of workers.
+    """
+    names = [f"Fleet {i + 1}" for i in range(len(fleets))] if names is None else list(names)
+    n = len(fleets)
+    pair_seeds = spawn_streams(seed, n * n)
+    tasks = [(i, engine, n_fights, pair_seeds[i * n:(i + 1) * n]) for i in range(n)]
+
+    if workers <= 1:
+        _init_worker(fleets, engine)
+        rows = [_matrix_row(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(fleets, engine)) as executor:
+            rows = list(executor.map(_matrix_row, tasks))
+
+    outcomes = np.array(rows, dtype=float).reshape(n, n, 3)
+    return MatchupMatrix(names, outcomes[:, :, 0], outcomes[:, :, 1], outcomes[:, :, 2])
+
+
+def main(argv=None):
+    from batch_runner import parse_army
+
+    parser = argparse.ArgumentParser(description="Win probability matrix for a list of fleets.")
+    parser.add_argument("fleets", help="JSON file with named fleets: {name: [ships]}")
+    parser.add_argument("--engine", choices=ENGINES, default="vectorized")
+    parser.add_argument("--n-fights", type=int, default=10000, help="trials per matchup (vectorized engine)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--csv", help="also write attacker, defender, win, draw, loss rows to this file")
+    args = parser.parse_args(argv)
+
+    with open(args.fleets) as f:
+        definitions = json.load(f)
+    fleets = {}
+    for name, ships in definitions.items():
+        fleets[name] = parse_army(ships, fleets)
+
+    matrix = matchup_matrix(list(fleets.values()), names=list(fleets), engine=args.engine,
+                            n_fights=args.n_fights, workers=args.workers, seed=args.seed)
+    print(matrix)
+    if args.csv:
+        matrix.write_csv(args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+from Ships import *  # assuming Ships module is present with the Default classes
+from collections import OrderedDict
+from dataclasses import astuple
+from functools import partial
+import atexit
+import os
+import pickle
+import tempfile
+import threading
+import time
+import numpy as np
+from fight_simulation import as_specs, is_grouped, removal_order, simulate_fight, to_groups
+from vectorized_simulation import simulate_fight_vectorized, vectorized_tallies
+from exact_simulation import simulate_fight_exact
+from adaptive_simulation import simulate_fight_adaptive
+from army_stat import get_statistics_exact, get_statistics_normal, get_statistics_simulation
+
+# A persistent cache rewrites its file at most this often while new results come in
+SAVE_INTERVAL = 30.0
+
+
+def fleet_signature(army: list[Ship]) -> tuple:
+    # Multiset of ship stat tuples: the same fleet in any order or with other objects has the same signature
+    # (a UnitGroup counts as its units)
+    return tuple(sorted(astuple(spec) for spec in as_specs(army)))
+
+
+def canonical_fleet(army: list[Ship], removal_policy="combat") -> list[ShipSpec]:
+    """
+    Fleet as specs in the order ``removal_policy`` removes them.
+
+    The removal policies order every pair of different ships by their stats, so this
+    is the same for any army order and a cached run loses ships exactly like a direct
+    run on the user's fleet. Count-compressed fleets stay count-compressed.
+    """
+    specs = as_specs(army)
+    fleet = [specs[i] for i in removal_order(specs, removal_policy)]
+    return to_groups(fleet) if is_grouped(army) else fleet
+
+
+class ResultCache:
+    """
+    Least-recently-used cache of simulation and statistics results.
+
+    With ``path`` set the entries are loaded from and written back to a pickle file,
+    so repeated matchups stay instant between sessions. New results only mark the
+    cache dirty; the file is rewritten at most every ``save_interval`` seconds and on
+    close() (also run at interpreter exit), so a miss does not cost a full rewrite.
+    ``hits`` and ``misses`` count lookups since the cache was created.
+    """
+    def __init__(self, max_entries=256, path=None, save_interval=SAVE_INTERVAL):
+        self.max_entries = max_entries
+        self.path = path
+        self.save_interval = save_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        # UI jobs run on worker threads, so entry access is serialised (computing is not)
+        self._lock = threading.RLock()
+        if path is not None and os.path.exists(path):
+            with open(path, "rb") as f:
+                self._entries.update(pickle.load(f))
+            self._evict()
+        if path is not None:
+            atexit.register(self.close)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        if getattr(value, "cancelled", False):
+            # Partial results of a cancelled run are never reused
+            return value
+        with self._lock:
+            self._entries[key] = value
+            self._evict()
+            self._dirty = True
+            save_due = self.path is not None and time.monotonic() - self._last_save >= self.save_interval
+        if save_due:
+            self.save()
+        return value
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        with self._lock:
+            entries = dict(self._entries)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        # Write to a temporary file first so an interrupted save never corrupts the cache
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False) as f:
+            pickle.dump(entries, f)
+        os.replace(f.name, self.path)
+
+    def close(self):
+        # Write pending results to the cache file
+        if self.path is not None and self._dirty:
+            self.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self._dirty = True
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+default_cache = ResultCache()
+
+
+def cached_simulate_fight(armies: list[list[Ship]], engine="vectorized", n_fights=10000, precision=None,
+                          max_seconds=None, seed=None, cache: ResultCache = None, progress=None,
+                          removal_policy="combat"):
+    """
+    simulate_fight front end that caches results per canonical matchup.
+
+    ``engine`` is one of "loop", "vectorized", "exact" or "adaptive" (which uses
+    ``precision`` and ``max_seconds`` instead of ``n_fights``). The key is (fleet 1
+    signature, fleet 2 signature, engine, n_fights or precision, seed, removal policy).
+    ``progress`` is passed on to the adaptive engine and not part of the key.
+    """
+    cache = default_cache if cache is None else cache
+    fleets = [canonical_fleet(army, removal_policy) for army in armies]
+
+    if engine == "exact":
+        size = None
+    elif engine == "adaptive":
+        size = (precision, max_seconds)
+    else:
+        size = n_fights
+    # Count-compressed fleets run on their own loop engine, with its own random stream
+    engine_key = "loop (grouped)" if engine == "loop" and any(is_grouped(fleet) for fleet in fleets) else engine
+    key = ("fight", fleet_signature(fleets[0]), fleet_signature(fleets[1]), engine_key, size, seed, removal_policy)
+
+    def compute():
+        if engine == "loop":
+            return simulate_fight(fleets, n_fights=n_fights, seed=seed, removal_policy=removal_policy)
+        if engine == "vectorized":
+            return simulate_fight_vectorized(fleets, n_fights=n_fights, seed=seed, removal_policy=removal_policy)
+        if engine == "exact":
+            return simulate_fight_exact(fleets, removal_policy=removal_policy)
+        if engine == "adaptive":
+            return simulate_fight_adaptive(fleets, precision=precision, max_seconds=max_seconds, seed=seed,
+                                           progress=progress,
+                                           tally_function=partial(vectorized_tallies, removal_policy=removal_policy))
+        raise ValueError(f"Unknown engine: {engine}")
+
+    return cache.get_or_compute(key, compute)
+
+
+def cached_army_statistics(army: list[Ship], method="exact", num_simulations=10000, seed=None,
+                           cache: ResultCache = None):
+    # get_statistics_* front end; method is "exact", "simulation", "normal" or "truncated_normal"
+    cache = default_cache if cache is None else cache
+    fleet = canonical_fleet(army)
+    size = num_simulations if method == "simulation" else None
+    key = ("statistics", fleet_signature(fleet), method, size, seed)
+
+    def compute():
+        if method == "exact":
+            return get_statistics_exact(fleet)
+        if method == "simulation":
+            return get_statistics_simulation(fleet, num_simulations, rng=np.random.default_rng(seed))
+        if method == "normal":
+            return get_statistics_normal(fleet)
+        if method == "truncated_normal":
+            return get_statistics_normal(fleet, use_truncated_normal=True)
+        raise ValueError(f"Unknown statistics method: {method}")
+
+    return cache.get_or_compute(key, compute)
+
+
+if __name__ == "__main__":
+    army_1 = [DefaultCruiser(), DefaultDreadnought()]
+    army_2 = [DefaultDestroyer()]
+
+    print(cached_simulate_fight([army_1, army_2], engine="exact"))
+    # Same matchup with the ships in another order is a cache hit
+    print(cached_simulate_fight([army_1[::-1], [DefaultDestroyer()]], engine="exact"))
+    print(default_cache.stats())
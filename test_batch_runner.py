@@ -0,0 +1,23 @@
+# Scenario records that must not stop a batch run
+# Run with: python -m pytest -q
+import json
+import pytest
+from batch_runner import main
+
+BLANK = {"custom": {"name": "Blank", "combat": 11, "cost": 1, "move": 1}}
+
+
+@pytest.mark.parametrize("engine", ["loop", "vectorized", "adaptive", "exact"])
+def test_no_hit_matchup_is_a_draw_and_the_sweep_goes_on(tmp_path, engine):
+    scenarios = tmp_path / "scenarios.jsonl"
+    records = [{"id": "stalemate", "army1": [BLANK], "army2": [BLANK, BLANK]},
+               {"id": "after", "army1": ["Cruiser"], "army2": ["Destroyer"]}]
+    scenarios.write_text("\n".join(json.dumps(record) for record in records) + "\n")
+    output = tmp_path / "results.jsonl"
+
+    assert main([str(scenarios), "--engine", engine, "--n-fights", "1000", "--precision", "0.05",
+                 "--seed", "1", "-o", str(output)]) == 0
+    stalemate, after = [json.loads(line) for line in output.read_text().splitlines()]
+    assert stalemate["id"] == "stalemate"
+    assert stalemate["result"]["draw_probability"] == 1.0
+    assert after["id"] == "after" and "error" not in after
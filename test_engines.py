@@ -0,0 +1,154 @@
+# Seeded checks of the simulation engines against the exact Markov-chain solver
+# Run with: python -m pytest -q
+from Ships import *  # assuming Ships module is present with the Default classes
+import pytest
+from fight_simulation import ARMY_LABELS, REMOVAL_POLICIES, is_grouped, simulate_fight, to_groups
+from exact_simulation import simulate_fight_exact
+from vectorized_simulation import simulate_fight_vectorized
+from result_cache import ResultCache, cached_simulate_fight
+from invasion import simulate_invasion
+from variant_comparison import compare_variants
+
+SEED = 2024
+N_FIGHTS = 20000
+# Several standard errors of a probability estimated from N_FIGHTS fights
+PROBABILITY_TOLERANCE = 0.02
+# Relative tolerance on the mean cost of surviving ships
+VALUE_TOLERANCE = 0.05
+
+
+def cruiser_duel():
+    return [[DefaultCruiser()], [DefaultCruiser()]]
+
+
+def mixed_battle():
+    # Sustain damage on one side, anti-fighter barrage against a fighter screen on the other
+    return [[DefaultDreadnought(), DefaultDreadnought(), DefaultCruiser()],
+            [DefaultCarrier(), DefaultDestroyer(), DefaultDestroyer()] + [DefaultFighter() for _ in range(4)]]
+
+
+def cannon_battle():
+    # Space cannon fire before the first round
+    return [[DefaultCruiser(), DefaultCruiser(), DefaultDestroyer()],
+            [DefaultCarrier(), DefaultFighter(), DefaultFighter(), SpaceCannon()]]
+
+
+MATCHUPS = [cruiser_duel, mixed_battle, cannon_battle]
+
+
+def assert_matches_exact(result, armies, removal_policy="combat"):
+    exact = simulate_fight_exact(armies, removal_policy=removal_policy)
+    assert result.draw_probability() == pytest.approx(exact.draw_probability(), abs=PROBABILITY_TOLERANCE)
+    for label in ARMY_LABELS:
+        assert result.win_probability(label) == pytest.approx(exact.win_probability(label),
+                                                              abs=PROBABILITY_TOLERANCE)
+        assert result.expected_survivor_value(label) == pytest.approx(exact.expected_survivor_value(label),
+                                                                      rel=VALUE_TOLERANCE, abs=0.05)
+
+
+@pytest.mark.parametrize("matchup", MATCHUPS)
+def test_vectorized_matches_exact(matchup):
+    armies = matchup()
+    assert_matches_exact(simulate_fight_vectorized(armies, n_fights=N_FIGHTS, seed=SEED), armies)
+
+
+def test_exact_cruiser_duel_closed_form():
+    # Each cruiser hits with probability 0.4, so a round decides the duel with probability 1 - 0.6^2
+    # and ends it in a draw with probability 0.4^2
+    result = simulate_fight_exact(cruiser_duel())
+    decided = 1 - 0.6 ** 2
+    assert result.draw_probability() == pytest.approx(0.16 / decided)
+    for label in ARMY_LABELS:
+        assert result.win_probability(label) == pytest.approx(0.24 / decided)
+
+
+@pytest.mark.parametrize("matchup", MATCHUPS)
+def test_exact_matches_simulation(matchup):
+    armies = matchup()
+    assert_matches_exact(simulate_fight(armies, n_fights=N_FIGHTS, seed=SEED), armies)
+
+
+@pytest.mark.parametrize("removal_policy", ["cheapest", "fighters_first"])
+def test_exact_follows_removal_policy(removal_policy):
+    armies = mixed_battle()
+    result = simulate_fight(armies, n_fights=N_FIGHTS, seed=SEED, removal_policy=removal_policy)
+    assert_matches_exact(result, armies, removal_policy)
+
+
+def fighter_swarm():
+    return [[UnitGroup.of(DefaultCarrier(), 2), UnitGroup.of(DefaultFighter(), 12)],
+            [UnitGroup.of(DefaultDreadnought(), 4), UnitGroup.of(DefaultDestroyer(), 2)]]
+
+
+@pytest.mark.parametrize("matchup", MATCHUPS)
+def test_grouped_matches_exact(matchup):
+    armies = [to_groups(army) for army in matchup()]
+    assert all(is_grouped(army) for army in armies)
+    assert_matches_exact(simulate_fight(armies, n_fights=N_FIGHTS, seed=SEED), armies)
+
+
+def test_grouped_swarm_matches_exact():
+    armies = fighter_swarm()
+    assert_matches_exact(simulate_fight(armies, n_fights=N_FIGHTS, seed=SEED), armies)
+
+
+@pytest.mark.parametrize("removal_policy", sorted(REMOVAL_POLICIES))
+def test_cached_run_matches_direct_run(removal_policy):
+    # Carrier and fighters tie on combat value, so only the tie-break decides which goes first
+    cache = ResultCache()
+    defenders = [DefaultCruiser(), DefaultCruiser()]
+    for fleet in ([DefaultFighter(), DefaultFighter(), DefaultCarrier()],
+                  [DefaultCarrier(), DefaultFighter(), DefaultFighter()]):
+        armies = [fleet, defenders]
+        direct = simulate_fight_exact(armies, removal_policy=removal_policy)
+        cached = cached_simulate_fight(armies, engine="exact", cache=cache, removal_policy=removal_policy)
+        for label in ARMY_LABELS:
+            assert cached.win_probability(label) == pytest.approx(direct.win_probability(label))
+            assert cached.expected_survivor_value(label) == pytest.approx(direct.expected_survivor_value(label))
+    assert cache.hits == 1
+
+
+def test_invasion_keeps_transports():
+    # The carrier is the only ship with capacity; losing it first would strand all four infantry
+    ground_forces = [DefaultInfantry() for _ in range(4)]
+    escorts = {"fighters": [DefaultFighter() for _ in range(3)], "cruiser": [DefaultCruiser()]}
+    expected = {"fighters": 0.978, "cruiser": 0.791}
+    for name, escort in escorts.items():
+        result = simulate_invasion([DefaultCarrier()] + escort, ground_forces, [DefaultCruiser()],
+                                   [DefaultInfantry()], cache=ResultCache())
+        assert result.capture_probability == pytest.approx(expected[name], abs=0.005)
+
+
+def blank_ship():
+    # Combat 11 never hits
+    return Ship(name="Blank", combat=11, cost=1, move=1)
+
+
+@pytest.mark.parametrize("engine", ["loop", "vectorized", "adaptive", "exact"])
+def test_no_hit_fights_end_in_a_draw(engine):
+    for armies in ([[blank_ship()], [blank_ship(), blank_ship()]],
+                   [to_groups([blank_ship()]), [UnitGroup.of(blank_ship(), 3)]]):
+        result = cached_simulate_fight(armies, engine=engine, n_fights=1000, precision=0.05, seed=SEED,
+                                       cache=ResultCache())
+        assert result.draw_probability() == 1.0
+
+
+def test_fights_that_stall_midway_end_in_a_draw():
+    # Army 1's destroyer is its only ship that can hit; once it is lost neither side can
+    armies = [[DefaultDestroyer(), blank_ship()], [blank_ship(), DefaultDestroyer()]]
+    exact = simulate_fight_exact(armies)
+    for result in (simulate_fight(armies, n_fights=N_FIGHTS, seed=SEED),
+                   simulate_fight([to_groups(army) for army in armies], n_fights=N_FIGHTS, seed=SEED),
+                   simulate_fight_vectorized(armies, n_fights=N_FIGHTS, seed=SEED)):
+        assert result.draw_probability() == pytest.approx(exact.draw_probability(), abs=PROBABILITY_TOLERANCE)
+    comparison = compare_variants([armies[0]], armies[1], n_fights=N_FIGHTS, seed=SEED)
+    assert comparison.draw_probability[0] == pytest.approx(exact.draw_probability(), abs=PROBABILITY_TOLERANCE)
+
+
+def test_grouped_fights_cannot_be_profiled(tmp_path):
+    armies = fighter_swarm()
+    with pytest.raises(ValueError):
+        simulate_fight(armies, n_fights=10, profile=True)
+    with pytest.raises(ValueError):
+        simulate_fight(armies, n_fights=10, trace_path=str(tmp_path / "trace.json"))
+    assert not (tmp_path / "trace.json").exists()
@@ -1,13 +1,25 @@
+import time
+_START = time.perf_counter()  # reference point of the --startup-time report
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QListWidget, QTextEdit, QCheckBox, QLabel,
-    QTabWidget, QScrollArea, QGroupBox, QDialog, QLineEdit, QListWidgetItem
+    QPushButton, QListView, QTextEdit, QCheckBox, QLabel,
+    QTabWidget, QScrollArea, QGroupBox, QDialog, QLineEdit,
+    QProgressBar, QStyle, QStyledItemDelegate, QStyleOptionButton, QStyleOptionViewItem
+)
+from PyQt6.QtCore import (
+    Qt, QAbstractListModel, QEvent, QModelIndex, QObject, QRect, QSize, QThread, QTimer, pyqtSignal
 )
-from PyQt6.QtCore import Qt
 from Ships import *  # Assuming all DefaultShip classes are defined there
-from fight_simulation import simulate_fight
-from army_stat import get_statistics_normal, get_statistics_simulation
+
+# The simulation modules (and with them NumPy and SciPy) are imported by the jobs that
+# need them, on their worker thread, so the window does not wait for them at startup.
+# Run "ui.py --startup-time" to measure time to first window.
+STARTUP_TIME_FLAG = "--startup-time"
+HEAVY_MODULES = ("numpy", "scipy", "result_cache", "marginal_value")
+
+# Pause after the last fleet edit before a live estimate starts, so a burst of clicks starts one run
+LIVE_DEBOUNCE_MS = 30
 
 ship_classes = [
     DefaultCruiser,
@@ -21,6 +33,11 @@ ship_classes = [
 
 non_upgradeable = [DefaultFlagship, DefaultWarSun]
 
+
+def _class_label(ship_cls) -> str:
+    # Button label from the class itself, no instance needed ("DefaultCruiser" -> "Cruiser")
+    return ship_cls.__name__.removeprefix("Default")
+
 class CustomShipDialog(QDialog):
     def __init__(self, army_callback, army_name="Army"):
         super().__init__()
@@ -78,49 +95,406 @@ class CustomShipDialog(QDialog):
         self.army_callback(custom_ship)
         self.accept()
     
+class SimulationJob(QObject):
+    """
+    Runs ``task(job)`` on a worker thread.
+
+    The task may call job.report(text, fights, fraction) to publish partial results
+    and should return early once job.cancelled is set. It returns the final text.
+    """
+    progress = pyqtSignal(str, int, float)
+    finished = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, task):
+        super().__init__()
+        self.task = task
+        self.cancelled = False
+
+    def run(self):
+        try:
+            text = self.task(self)
+        except Exception as error:
+            self.failed.emit(f"{type(error).__name__}: {error}")
+        else:
+            self.finished.emit(text)
+
+    def report(self, text: str, fights: int = 0, fraction: float = -1.0):
+        # fraction < 0 means the amount of work left is unknown
+        self.progress.emit(text, fights, fraction)
+
+
+class JobPanel(QWidget):
+    """
+    Progress bar, elapsed time / fights per second readout and Cancel button for
+    one background SimulationJob at a time. Results are written to ``output``; the
+    ``run_buttons`` that start jobs are disabled while one runs.
+    """
+    def __init__(self, output: QTextEdit, *run_buttons: QPushButton):
+        super().__init__()
+        self.output = output
+        self.run_buttons = run_buttons
+        self.thread = None
+        self.job = None
+        self.start_time = 0.0
+        self.fights = 0
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.status = QLabel("Idle")
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel)
+        layout.addWidget(self.progress_bar, 1)
+        layout.addWidget(self.status)
+        layout.addWidget(self.cancel_btn)
+
+        # Keeps the elapsed time ticking between progress reports
+        self.timer = QTimer(self)
+        self.timer.setInterval(200)
+        self.timer.timeout.connect(self._update_status)
+
+    def is_running(self) -> bool:
+        return self.thread is not None
+
+    def start(self, task):
+        if self.is_running():
+            return
+        self.job = SimulationJob(task)
+        self.thread = QThread()
+        self.job.moveToThread(self.thread)
+        self.thread.started.connect(self.job.run)
+        self.job.progress.connect(self._on_progress)
+        self.job.finished.connect(self._on_finished)
+        self.job.failed.connect(self._on_failed)
+        self.job.finished.connect(self.thread.quit)
+        self.job.failed.connect(self.thread.quit)
+        self.thread.finished.connect(self._cleanup)
+
+        self.start_time = time.perf_counter()
+        self.fights = 0
+        self.progress_bar.setRange(0, 0)  # busy until the first report
+        self.cancel_btn.setEnabled(True)
+        for button in self.run_buttons:
+            button.setEnabled(False)
+        self.thread.start()
+        self.timer.start()
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancelled = True
+            self.cancel_btn.setEnabled(False)
+            self.status.setText("Cancelling...")
+
+    def shutdown(self):
+        # Called when the window closes: stop the job and wait for its thread
+        if self.is_running():
+            self.cancel()
+            self.thread.wait()
+
+    def _on_progress(self, text: str, fights: int, fraction: float):
+        self.output.setPlainText(text)
+        self.fights = fights
+        if fraction >= 0:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(int(min(fraction, 1.0) * 100))
+        self._update_status()
+
+    def _on_finished(self, text: str):
+        self.output.setPlainText(text)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(100)
+
+    def _on_failed(self, message: str):
+        self.output.setPlainText(f"Error: {message}")
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+
+    def _update_status(self):
+        elapsed = time.perf_counter() - self.start_time
+        status = f"{elapsed:.1f} s"
+        if self.fights and elapsed > 0:
+            status += f" | {self.fights:,} fights | {self.fights / elapsed:,.0f} fights/s"
+        self.status.setText(status)
+
+    def _cleanup(self):
+        self.timer.stop()
+        self._update_status()
+        self.cancel_btn.setEnabled(False)
+        for button in self.run_buttons:
+            button.setEnabled(True)
+        self.thread.deleteLater()
+        self.job.deleteLater()
+        self.thread = None
+        self.job = None
+
+
+class LiveEstimate(QLabel):
+    """
+    One-line estimate that follows the fleets while they are edited.
+
+    schedule() is called on every fleet change: it cancels the running estimate and,
+    once edits pause for LIVE_DEBOUNCE_MS, runs ``task(snapshot(), job)`` on a worker
+    thread. The task publishes refined texts through job.report and returns the final
+    one; anything a cancelled job still sends is ignored.
+    """
+    def __init__(self, snapshot, task):
+        super().__init__("Live estimate: add ships to start")
+        self.setWordWrap(True)
+        self.snapshot = snapshot
+        self.task = task
+        self.thread = None
+        self.job = None
+        self.pending = False
+
+        self.debounce = QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(LIVE_DEBOUNCE_MS)
+        self.debounce.timeout.connect(self._start)
+
+    def schedule(self):
+        if self.job is not None:
+            self.job.cancelled = True
+        self.debounce.start()
+
+    def shutdown(self):
+        self.debounce.stop()
+        self.pending = False
+        if self.thread is not None:
+            self.job.cancelled = True
+            self.thread.wait()
+
+    def _start(self):
+        if self.thread is not None:
+            # The cancelled job stops within one batch; start again once it has
+            self.pending = True
+            return
+        fleets, task = self.snapshot(), self.task
+        self.job = SimulationJob(lambda job: task(fleets, job))
+        self.thread = QThread()
+        self.job.moveToThread(self.thread)
+        self.thread.started.connect(self.job.run)
+        self.job.progress.connect(self._on_progress)
+        self.job.finished.connect(self._on_finished)
+        self.job.failed.connect(self._on_failed)
+        self.job.finished.connect(self.thread.quit)
+        self.job.failed.connect(self.thread.quit)
+        self.thread.finished.connect(self._cleanup)
+        self.thread.start()
+
+    def _on_progress(self, text: str, fights: int, fraction: float):
+        if not self.job.cancelled:
+            self.setText(text)
+
+    def _on_finished(self, text: str):
+        if not self.job.cancelled:
+            self.setText(text)
+
+    def _on_failed(self, message: str):
+        if not self.job.cancelled:
+            self.setText(f"Live estimate failed: {message}")
+
+    def _cleanup(self):
+        self.thread.deleteLater()
+        self.job.deleteLater()
+        self.thread = None
+        self.job = None
+        if self.pending:
+            self.pending = False
+            self._start()
+
+
+def _live_battle_line(result, final: bool) -> str:
+    low, high = result.intervals["Army 1"]
+    refining = "" if final else ", refining..."
+    return (f"Live estimate ({result.n_fights:,} fights{refining}): Army 1 wins {result.win_probability('Army 1'):.1%}"
+            f" [{low:.1%}-{high:.1%}], Army 2 wins {result.win_probability('Army 2'):.1%},"
+            f" draw {result.draw_probability():.1%}")
+
+
+def live_battle_estimate(armies, job) -> str:
+    # Coarse-to-fine win probability: 1k, 10k then 100k fights, reported after each stage
+    if not armies[0] or not armies[1]:
+        return "Live estimate: add ships to both armies"
+    from adaptive_simulation import PROGRESSIVE_STAGES, simulate_fight_progressive
+
+    def progress(partial):
+        if partial.n_fights in PROGRESSIVE_STAGES[:-1]:
+            job.report(_live_battle_line(partial, final=False), partial.n_fights)
+        return not job.cancelled
+
+    result = simulate_fight_progressive(armies, progress=progress)
+    return "" if result.cancelled else _live_battle_line(result, final=True)
+
+
+def live_army_estimate(armies, job) -> str:
+    # Hits per round of the army being built; exact, so one step is enough
+    army = armies[0]
+    if not army:
+        return "Live estimate: add ships to start"
+    from army_stat import exact_hit_statistics
+    stats = exact_hit_statistics(army)
+    return (f"Live estimate: {stats['mean']:.2f} mean hits per round (std {stats['std_dev']:.2f}),"
+            f" median {stats['quantiles'][0.50]}, cost {stats['cost']}, health {stats['health']}")
+
+
 def _ship_display_name(ship: Ship) -> str:
     # Consistent label in list
     return getattr(ship, "name", ship.__class__.__name__)
 
-def _add_ship_row(list_widget: QListWidget, ship: Ship, on_copy, on_delete):
-    """
-    Adds a row to a QListWidget with:
-      - ship name label
-      - Copy button
-      - Delete button
-    Stores the Ship instance in the QListWidgetItem (Qt.UserRole).
+class FleetModel(QAbstractListModel):
     """
-    item = QListWidgetItem(list_widget)
-    item.setData(Qt.ItemDataRole.UserRole, ship)
+    One army shown as one row per distinct ship (same ShipSpec), with a count.
 
-    row_widget = QWidget()
-    row_layout = QHBoxLayout(row_widget)
-    row_layout.setContentsMargins(6, 2, 6, 2)
-
-    name_lbl = QLabel(_ship_display_name(ship))
-    copy_btn = QPushButton("Copy")
-    del_btn = QPushButton("Delete")
+    ``ships`` is the army list itself and every change goes through the model, so
+    the list and the rows always agree; ``fleet_changed`` is emitted after each one.
+    Rows keep the order in which their first ship was added. A row's template ship
+    (Qt.UserRole) is the first ship added to it.
+    """
+    fleet_changed = pyqtSignal()
+    CountRole = Qt.ItemDataRole.UserRole + 1
 
-    copy_btn.setFixedWidth(70)
-    del_btn.setFixedWidth(70)
+    def __init__(self, ships: list[Ship]):
+        super().__init__()
+        self.ships = ships
+        self.rows = []  # [spec, count, template ship]
+        self.row_of = {}  # spec -> row
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        _, count, ship = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return _ship_display_name(ship)
+        if role == Qt.ItemDataRole.UserRole:
+            return ship
+        if role == self.CountRole:
+            return count
+        return None
+
+    def template(self, row: int) -> Ship:
+        return self.rows[row][2]
+
+    def append(self, ship: Ship):
+        spec = ship.spec()
+        self.ships.append(ship)
+        row = self.row_of.get(spec)
+        if row is None:
+            row = len(self.rows)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.rows.append([spec, 1, ship])
+            self.row_of[spec] = row
+            self.endInsertRows()
+        else:
+            self.rows[row][1] += 1
+            self.dataChanged.emit(self.index(row), self.index(row), [self.CountRole])
+        self.fleet_changed.emit()
+
+    def remove_one(self, row: int):
+        # Drop the most recently added ship of this row
+        spec = self.rows[row][0]
+        for i in range(len(self.ships) - 1, -1, -1):
+            if self.ships[i].spec() == spec:
+                del self.ships[i]
+                break
+        self._decrement(row)
+
+    def pop(self):
+        # Drop the last ship of the army
+        if self.ships:
+            self._decrement(self.row_of[self.ships.pop().spec()])
+
+    def clear(self):
+        self.beginResetModel()
+        self.ships.clear()
+        self.rows.clear()
+        self.row_of.clear()
+        self.endResetModel()
+        self.fleet_changed.emit()
+
+    def _decrement(self, row: int):
+        self.rows[row][1] -= 1
+        if self.rows[row][1]:
+            self.dataChanged.emit(self.index(row), self.index(row), [self.CountRole])
+        else:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.rows[row]
+            self.row_of = {spec: r for r, (spec, _, _) in enumerate(self.rows)}
+            self.endRemoveRows()
+        self.fleet_changed.emit()
 
-    row_layout.addWidget(name_lbl)
-    row_layout.addStretch(1)
-    row_layout.addWidget(copy_btn)
-    row_layout.addWidget(del_btn)
 
-    # Connect actions (use the QListWidgetItem as stable reference)
-    copy_btn.clicked.connect(lambda: on_copy(item))
-    del_btn.clicked.connect(lambda: on_delete(item))
+class FleetDelegate(QStyledItemDelegate):
+    """
+    Paints a FleetModel row as "name  x count" with - and + buttons on the right.
 
-    # Finish list row
-    item.setSizeHint(row_widget.sizeHint())
-    list_widget.addItem(item)
-    list_widget.setItemWidget(item, row_widget)
+    The buttons are painted, not widgets, so a row costs nothing until it is on
+    screen; clicks on them emit remove_requested / add_requested with the row.
+    """
+    add_requested = pyqtSignal(int)
+    remove_requested = pyqtSignal(int)
+    BUTTON_WIDTH = 32
+    ROW_HEIGHT = 30
+    MARGIN = 4
+
+    def button_rects(self, rect: QRect) -> tuple[QRect, QRect]:
+        plus = QRect(rect.right() - self.MARGIN - self.BUTTON_WIDTH, rect.top() + 2,
+                     self.BUTTON_WIDTH, rect.height() - 4)
+        minus = plus.translated(-(self.BUTTON_WIDTH + self.MARGIN), 0)
+        return minus, plus
+
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        minus, plus = self.button_rects(option.rect)
+
+        item = QStyleOptionViewItem(option)
+        self.initStyleOption(item, index)
+        item.text = f"{item.text}   x{index.data(FleetModel.CountRole)}"
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, item, painter, option.widget)
+        item.rect = option.rect.adjusted(0, 0, -(2 * self.BUTTON_WIDTH + 3 * self.MARGIN), 0)
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, item, painter, option.widget)
+
+        for rect, label in ((minus, "-"), (plus, "+")):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = label
+            button.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+            style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(super().sizeHint(option, index).width() + 2 * self.BUTTON_WIDTH, self.ROW_HEIGHT)
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        if event.type() in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease,
+                            QEvent.Type.MouseButtonDblClick):
+            minus, plus = self.button_rects(option.rect)
+            position = event.position().toPoint()
+            for rect, signal in ((minus, self.remove_requested), (plus, self.add_requested)):
+                if rect.contains(position):
+                    if event.type() == QEvent.Type.MouseButtonRelease:
+                        signal.emit(index.row())
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+
+def _fleet_view(model: FleetModel, on_add, on_remove) -> QListView:
+    # List view of a FleetModel with +/- buttons per row
+    view = QListView()
+    view.setModel(model)
+    view.setUniformItemSizes(True)
+    delegate = FleetDelegate(view)
+    delegate.add_requested.connect(on_add)
+    delegate.remove_requested.connect(on_remove)
+    view.setItemDelegate(delegate)
+    return view
 
-    return item
 
-        
 class ArmyTab(QWidget):
     def __init__(self):
         super().__init__()
@@ -128,14 +502,15 @@ class ArmyTab(QWidget):
         self.clipboard_ship = None  # remembers last ship to replicate
 
         layout = QVBoxLayout()
-        self.army_list = QListWidget()
+        self.army_model = FleetModel(self.army)
+        self.army_list = _fleet_view(self.army_model, self.copy_ship_from_row, self.delete_ship_from_row)
         layout.addWidget(QLabel("Army"))
         layout.addWidget(self.army_list)
 
         ship_controls = QVBoxLayout()
         for ship_cls in ship_classes:
             box = QHBoxLayout()
-            label = QLabel(ship_cls().__class__.__name__[7:])
+            label = QLabel(_class_label(ship_cls))
             add_btn = QPushButton("+")
             add_btn.setFixedWidth(40)
             if ship_cls not in non_upgradeable:
@@ -159,12 +534,18 @@ class ArmyTab(QWidget):
         
         layout.addLayout(ship_controls)
 
-        analyse_btn = QPushButton("Analyse")
-        analyse_btn.clicked.connect(self.analyse_army)
-        layout.addWidget(analyse_btn)
+        self.live = LiveEstimate(lambda: [list(self.army)], live_army_estimate)
+        self.army_model.fleet_changed.connect(self.live.schedule)
+        layout.addWidget(self.live)
+
+        self.analyse_btn = QPushButton("Analyse")
+        self.analyse_btn.clicked.connect(self.analyse_army)
+        layout.addWidget(self.analyse_btn)
 
         self.output = QTextEdit()
         self.output.setReadOnly(True)
+        self.jobs = JobPanel(self.output, self.analyse_btn)
+        layout.addWidget(self.jobs)
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
         scroll.setWidget(self.output)
@@ -194,13 +575,7 @@ class ArmyTab(QWidget):
         # Store a safe template copy if you have copy(); otherwise store the object itself.
         self.clipboard_ship = ship.copy() if hasattr(ship, "copy") else ship
 
-        self.army.append(ship)
-        _add_ship_row(
-            self.army_list,
-            ship,
-            on_copy=self.copy_ship_from_row,
-            on_delete=self.delete_ship_from_row
-        )    
+        self.army_model.append(ship)
 
     def add_ship(self, cls, upgraded):
         ship = cls()
@@ -209,10 +584,7 @@ class ArmyTab(QWidget):
         self._append_ship(ship)
 
     def delete_last_ship(self):
-        if not self.army:
-            return
-        self.army.pop()
-        self.army_list.takeItem(self.army_list.count() - 1)
+        self.army_model.pop()
     
     def add_last_ship(self):
         if self.clipboard_ship is None:
@@ -220,20 +592,13 @@ class ArmyTab(QWidget):
         new_ship = self.clipboard_ship.copy() if hasattr(self.clipboard_ship, "copy") else self.clipboard_ship
         self._append_ship(new_ship)
         
-    def delete_ship_from_row(self, item):
-        idx = self.army_list.row(item)
-        if idx < 0:
-            return
-        # Remove from model and UI
-        del self.army[idx]
-        self.army_list.takeItem(idx)
-
-    def copy_ship_from_row(self, item):
-        # Copy the ship in this row to clipboard AND immediately add a new instance to the list
-        ship = item.data(Qt.ItemDataRole.UserRole)
-        if ship is None:
-            return
+    def delete_ship_from_row(self, row: int):
+        # "-" on a row: one ship of that kind less
+        self.army_model.remove_one(row)
 
+    def copy_ship_from_row(self, row: int):
+        # "+" on a row: copy its ship to clipboard AND immediately add a new instance to the list
+        ship = self.army_model.template(row)
         self.clipboard_ship = ship.copy() if hasattr(ship, "copy") else ship
         new_ship = self.clipboard_ship.copy() if hasattr(self.clipboard_ship, "copy") else self.clipboard_ship
         self._append_ship(new_ship)
@@ -247,15 +612,25 @@ class ArmyTab(QWidget):
 
 
     def clear_army(self):
-        self.army.clear()
-        self.army_list.clear()
+        self.army_model.clear()
 
     def analyse_army(self):
-        simulation =  get_statistics_simulation(self.army)
-        normal = get_statistics_normal(self.army)
-        normal_truncated = get_statistics_normal(self.army, use_truncated_normal=True)
-        result = "Simulated statistics\n" + simulation + "\n Normal approximation Statistic:\n" + normal + "\n Normal trancated:\n" + normal_truncated 
-        self.output.setPlainText(result)
+        army = list(self.army)  # snapshot, the list may change while the job runs
+        sections = [("Exact statistics\n", "exact"),
+                    ("\n Normal approximation Statistic:\n", "normal"),
+                    ("\n Normal trancated:\n", "truncated_normal")]
+
+        def task(job):
+            from result_cache import cached_army_statistics
+            result = ""
+            for done, (title, method) in enumerate(sections, start=1):
+                if job.cancelled:
+                    break
+                result += title + cached_army_statistics(army, method=method)
+                job.report(result, fraction=done / len(sections))
+            return result
+
+        self.jobs.start(task)
 
 class SimulateTab(QWidget):
     def __init__(self):
@@ -271,11 +646,13 @@ class SimulateTab(QWidget):
         # Army 1 panel
         army1_box = QVBoxLayout()
         army1_box.addWidget(QLabel("Army 1"))
-        self.army1_list = QListWidget()
+        self.army1_model = FleetModel(self.army1)
+        self.army1_list = _fleet_view(self.army1_model, lambda row: self.copy_ship_from_row(row, 1),
+                                      lambda row: self.delete_ship_from_row(row, 1))
         army1_box.addWidget(self.army1_list)
         for ship_cls in ship_classes:
             row = QHBoxLayout()
-            label = QLabel(ship_cls().__class__.__name__[7:])
+            label = QLabel(_class_label(ship_cls))
             add_btn = QPushButton("+")
             add_btn.setFixedWidth(40)
             if ship_cls not in non_upgradeable:
@@ -316,11 +693,13 @@ class SimulateTab(QWidget):
         # Army 2 panel
         army2_box = QVBoxLayout()
         army2_box.addWidget(QLabel("Army 2"))
-        self.army2_list = QListWidget()
+        self.army2_model = FleetModel(self.army2)
+        self.army2_list = _fleet_view(self.army2_model, lambda row: self.copy_ship_from_row(row, 2),
+                                      lambda row: self.delete_ship_from_row(row, 2))
         army2_box.addWidget(self.army2_list)
         for ship_cls in ship_classes:
             row = QHBoxLayout()
-            label = QLabel(ship_cls().__class__.__name__[7:])
+            label = QLabel(_class_label(ship_cls))
             add_btn = QPushButton("+")
             add_btn.setFixedWidth(40)
             if ship_cls not in non_upgradeable:
@@ -363,12 +742,26 @@ class SimulateTab(QWidget):
 
         layout.addLayout(armies_layout)
 
-        simulate_btn = QPushButton("Simulate Battle")
-        simulate_btn.clicked.connect(self.simulate_battle)
-        layout.addWidget(simulate_btn)
+        self.live = LiveEstimate(lambda: [list(self.army1), list(self.army2)], live_battle_estimate)
+        self.army1_model.fleet_changed.connect(self.live.schedule)
+        self.army2_model.fleet_changed.connect(self.live.schedule)
+        layout.addWidget(self.live)
+
+        simulate_row = QHBoxLayout()
+        self.simulate_btn = QPushButton("Simulate Battle")
+        self.simulate_btn.clicked.connect(self.simulate_battle)
+        simulate_row.addWidget(self.simulate_btn)
+        self.exact_box = QCheckBox("Exact")
+        simulate_row.addWidget(self.exact_box)
+        self.purchase_btn = QPushButton("Best Next Purchase")
+        self.purchase_btn.clicked.connect(self.rank_purchases)
+        simulate_row.addWidget(self.purchase_btn)
+        layout.addLayout(simulate_row)
 
         self.output = QTextEdit()
         self.output.setReadOnly(True)
+        self.jobs = JobPanel(self.output, self.simulate_btn, self.purchase_btn)
+        layout.addWidget(self.jobs)
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
         scroll.setWidget(self.output)
@@ -383,13 +776,11 @@ class SimulateTab(QWidget):
         self._append_ship(ship, army_num)
 
 
+    def _model(self, army_num: int) -> FleetModel:
+        return self.army1_model if army_num == 1 else self.army2_model
+
     def clear_army(self, army_num):
-        if army_num == 1:
-            self.army1.clear()
-            self.army1_list.clear()
-        else:
-            self.army2.clear()
-            self.army2_list.clear()
+        self._model(army_num).clear()
             
             
     def open_custom_dialog(self, army_number):
@@ -404,35 +795,10 @@ class SimulateTab(QWidget):
     def _append_ship(self, ship: Ship, army_num: int):
         # Remember last added ship globally across both armies
         self.clipboard_ship = ship.copy() if hasattr(ship, "copy") else ship
-
-        if army_num == 1:
-            self.army1.append(ship)
-            _add_ship_row(
-                self.army1_list,
-                ship,
-                on_copy=lambda item: self.copy_ship_from_row(item, 1),
-                on_delete=lambda item: self.delete_ship_from_row(item, 1),
-            )
-        else:
-            self.army2.append(ship)
-            _add_ship_row(
-                self.army2_list,
-                ship,
-                on_copy=lambda item: self.copy_ship_from_row(item, 2),
-                on_delete=lambda item: self.delete_ship_from_row(item, 2),
-            )
+        self._model(army_num).append(ship)
 
     def delete_last_ship(self, army_num: int):
-        if army_num == 1:
-            if not self.army1:
-                return
-            self.army1.pop()
-            self.army1_list.takeItem(self.army1_list.count() - 1)
-        else:
-            if not self.army2:
-                return
-            self.army2.pop()
-            self.army2_list.takeItem(self.army2_list.count() - 1)
+        self._model(army_num).pop()
 
     def add_last_ship(self, army_num: int):
         if self.clipboard_ship is None:
@@ -440,26 +806,13 @@ class SimulateTab(QWidget):
         new_ship = self.clipboard_ship.copy() if hasattr(self.clipboard_ship, "copy") else self.clipboard_ship
         self._append_ship(new_ship, army_num)
 
-    def delete_ship_from_row(self, item, army_num: int):
-        if army_num == 1:
-            idx = self.army1_list.row(item)
-            if idx < 0:
-                return
-            del self.army1[idx]
-            self.army1_list.takeItem(idx)
-        else:
-            idx = self.army2_list.row(item)
-            if idx < 0:
-                return
-            del self.army2[idx]
-            self.army2_list.takeItem(idx)
-
-    def copy_ship_from_row(self, item, army_num: int):
-        # Copy this ship to clipboard AND immediately add a new instance to the same army
-        ship = item.data(Qt.ItemDataRole.UserRole)
-        if ship is None:
-            return
+    def delete_ship_from_row(self, row: int, army_num: int):
+        # "-" on a row: one ship of that kind less
+        self._model(army_num).remove_one(row)
 
+    def copy_ship_from_row(self, row: int, army_num: int):
+        # "+" on a row: copy its ship to clipboard AND immediately add a new instance to the same army
+        ship = self._model(army_num).template(row)
         self.clipboard_ship = ship.copy() if hasattr(ship, "copy") else ship
         new_ship = self.clipboard_ship.copy() if hasattr(self.clipboard_ship, "copy") else self.clipboard_ship
         self._append_ship(new_ship, army_num)
@@ -467,8 +820,42 @@ class SimulateTab(QWidget):
             
             
     def simulate_battle(self):
-        result = simulate_fight([self.army1, self.army2], n_fights=10000)
-        self.output.setPlainText(result)
+        armies = [list(self.army1), list(self.army2)]  # snapshot, the lists may change while the job runs
+        exact = self.exact_box.isChecked()
+
+        def task(job):
+            from result_cache import cached_simulate_fight
+            if exact:
+                return str(cached_simulate_fight(armies, engine="exact"))
+
+            def progress(partial):
+                # Trials needed grow with 1 / width^2, which gives the fraction done
+                fraction = (partial.precision / partial.achieved_precision) ** 2
+                job.report(str(partial), partial.n_fights, fraction)
+                return not job.cancelled
+
+            # Runs only as many trials as needed for +-0.5% win probabilities (95% interval)
+            return str(cached_simulate_fight(armies, engine="adaptive", precision=0.01, max_seconds=30,
+                                             progress=progress))
+
+        self.jobs.start(task)
+
+    def rank_purchases(self):
+        # Which single unit added to Army 1 gains the most win probability per resource
+        armies = [list(self.army1), list(self.army2)]
+
+        def task(job):
+            if not armies[1]:
+                return "Army 2 is empty."
+            from marginal_value import marginal_values
+
+            def progress(fraction):
+                job.report("Ranking purchases...", fraction=fraction)
+                return not job.cancelled
+
+            return str(marginal_values(armies[0], armies[1], engine="exact", progress=progress))
+
+        self.jobs.start(task)
 
 
 
@@ -479,15 +866,51 @@ class MainWindow(QWidget):
         self.setWindowTitle("Army Simulator")
 
         tabs = QTabWidget()
-        tabs.addTab(ArmyTab(), "Analyse Army")
-        tabs.addTab(SimulateTab(), "Simulate Battle")
+        self.army_tab = ArmyTab()
+        self.simulate_tab = SimulateTab()
+        tabs.addTab(self.army_tab, "Analyse Army")
+        tabs.addTab(self.simulate_tab, "Simulate Battle")
 
         layout = QVBoxLayout()
         layout.addWidget(tabs)
         self.setLayout(layout)
 
+    def closeEvent(self, event):
+        # Let running background jobs stop before the window goes away
+        for tab in (self.army_tab, self.simulate_tab):
+            tab.jobs.shutdown()
+            tab.live.shutdown()
+        super().closeEvent(event)
+
+def report_startup_time(window_built: float, imports_done: float):
+    """
+    Print the startup timings (time to first window) and quit.
+
+    Times count from the first line of ui.py; in the packaged executable the
+    unpacking done by the bootloader before that is not included. Without a
+    console (windowed executable) the report is written to startup_time.txt.
+    """
+    shown = time.perf_counter()
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    report = (f"Imports: {(imports_done - _START) * 1000:.0f} ms\n"
+              f"Window built: {(window_built - _START) * 1000:.0f} ms\n"
+              f"First window shown: {(shown - _START) * 1000:.0f} ms\n"
+              f"Heavy modules loaded at startup: {', '.join(loaded) or 'none'}\n")
+    if sys.stdout is not None:
+        print(report, end="")
+    else:
+        with open("startup_time.txt", "w") as f:
+            f.write(report)
+    QApplication.quit()
+
+
 if __name__ == '__main__':
+    imports_done = time.perf_counter()
     app = QApplication(sys.argv)
     window = MainWindow()
+    window_built = time.perf_counter()
     window.show()
+    if STARTUP_TIME_FLAG in sys.argv:
+        # Runs once the event loop has processed the show and first paint
+        QTimer.singleShot(0, lambda: report_startup_time(window_built, imports_done))
     sys.exit(app.exec())
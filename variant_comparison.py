@@ -0,0 +1,196 @@
+from Ships import *  # assuming Ships module is present with the Default classes
+import numpy as np
+from fight_simulation import as_seed_sequence, as_specs, poisson_binomial_pmf
+from vectorized_simulation import BatchArmy, assign_damage_batch, remove_ships
+
+# Uniforms per trial drawn before combat: barrage of each army, then space cannons of each army
+PRECOMBAT_DRAWS = 4
+
+
+class HitSampler:
+    """
+    Inverse-CDF sampler of the hits a group of dice scores, one uniform per trial.
+
+    ``dice`` holds (threshold, number of dice) per slot. For every distinct count of
+    alive dice per threshold the hit CDF is built once (Poisson-binomial) and reused,
+    so a trial's hits are a monotone function of its uniform: a stronger fleet state
+    never scores fewer hits from the same draw, which is what makes common random
+    numbers effective.
+    """
+    def __init__(self, dice: list[tuple[int, int]]):
+        self.thresholds = sorted({threshold for threshold, n_dice in dice if n_dice > 0})
+        column = {threshold: c for c, threshold in enumerate(self.thresholds)}
+        # slots x thresholds matrix: dice each slot adds to each threshold column
+        self.dice_matrix = np.zeros((len(dice), len(self.thresholds)), dtype=np.int64)
+        for slot, (threshold, n_dice) in enumerate(dice):
+            if n_dice > 0:
+                self.dice_matrix[slot, column[threshold]] += n_dice
+        self._cdfs = {}
+
+    def cdf(self, dice_counts: tuple) -> np.ndarray:
+        cdf = self._cdfs.get(dice_counts)
+        if cdf is None:
+            cdf = np.cumsum(poisson_binomial_pmf(zip(self.thresholds, dice_counts)))
+            cdf[-1] = 1.0
+            self._cdfs[dice_counts] = cdf
+        return cdf
+
+    def sample(self, alive: np.ndarray, uniforms: np.ndarray) -> np.ndarray:
+        hits = np.zeros(alive.shape[0], dtype=np.int64)
+        if not self.thresholds or alive.shape[0] == 0:
+            return hits
+        counts = alive.astype(np.int64) @ self.dice_matrix
+        rows, inverse = np.unique(counts, axis=0, return_inverse=True)
+        for r, row in enumerate(rows):
+            members = inverse.ravel() == r
+            hits[members] = np.searchsorted(self.cdf(tuple(int(c) for c in row)), uniforms[members], side="right")
+        return hits
+
+
+class CrnArmy(BatchArmy):
+    # BatchArmy plus inverse-CDF samplers for combat, barrage and space cannon dice
+    def __init__(self, army: list[Ship], removal_policy="combat"):
+        army = as_specs(army)
+        super().__init__(army, removal_policy)
+        self.combat_sampler = HitSampler([(ship.combat, ship.hits) for ship in army])
+        self.barrage_sampler = HitSampler([(ship.anti_fighter_combat, ship.anti_fighter_hits if ship.anti_fighter_barrage else 0)
+                                           for ship in army])
+        self.cannon_sampler = HitSampler([(ship.combat, 1 if ship.is_space_cannon else 0) for ship in army])
+
+
+def antithetic_uniforms(rng: np.random.Generator, n_pairs: int, columns: int, antithetic: bool) -> np.ndarray:
+    # Trial i and i + n_pairs use u and 1 - u when antithetic pairing is on
+    uniforms = rng.random((n_pairs, columns))
+    return np.concatenate([uniforms, 1.0 - uniforms]) if antithetic else uniforms
+
+
+def crn_outcomes(army1: CrnArmy, army2: CrnArmy, n_pairs: int, seed_sequence: np.random.SeedSequence,
+                 antithetic=False) -> np.ndarray:
+    """
+    Per-trial outcome (1 army 1 wins, 0 draw, -1 army 2 wins) driven by shared uniforms.
+
+    Every trial has its own uniform for each army in every round, drawn in the same
+    order whatever the fleets are, so runs with the same ``seed_sequence`` reuse the
+    same random numbers trial by trial and round by round.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    n_trials = n_pairs * (2 if antithetic else 1)
+    alive1, sustain1 = army1.new_state(n_trials)
+    alive2, sustain2 = army2.new_state(n_trials)
+
+    # Precombat phase, in the order of fight_simulation.precombat_phase
+    pre = antithetic_uniforms(rng, n_pairs, PRECOMBAT_DRAWS, antithetic)
+    remove_ships(alive2, army2.fighter_order, army1.barrage_sampler.sample(alive1, pre[:, 0]))
+    remove_ships(alive1, army1.fighter_order, army2.barrage_sampler.sample(alive2, pre[:, 1]))
+    assign_damage_batch(army2, alive2, sustain2, army1.cannon_sampler.sample(alive1, pre[:, 2]))
+    assign_damage_batch(army1, alive1, sustain1, army2.cannon_sampler.sample(alive2, pre[:, 3]))
+    alive1[:, army1.cannon_mask] = False
+    alive2[:, army2.cannon_mask] = False
+
+    outcome = np.zeros(n_trials, dtype=np.int8)
+    trials = np.arange(n_trials)
+    while True:
+        has_ships1 = alive1.any(axis=1)
+        has_ships2 = alive2.any(axis=1)
+        outcome[trials[has_ships1 & ~has_ships2]] = 1
+        outcome[trials[has_ships2 & ~has_ships1]] = -1
+        active = has_ships1 & has_ships2
+        # Fights where neither side can ever hit again stay draws (outcome 0)
+        if army1.hitter_slot is not None and army2.hitter_slot is not None:
+            active &= ~(army1.cannot_hit(alive1) & army2.cannot_hit(alive2))
+        if not active.all():
+            trials = trials[active]
+            alive1, sustain1 = alive1[active], sustain1[active]
+            alive2, sustain2 = alive2[active], sustain2[active]
+        if trials.size == 0:
+            return outcome
+
+        # Uniforms are drawn for every trial, finished or not, to keep them aligned across runs
+        uniforms = antithetic_uniforms(rng, n_pairs, 2, antithetic)[trials]
+        army_1_hits = army1.combat_sampler.sample(alive1, uniforms[:, 0])
+        army_2_hits = army2.combat_sampler.sample(alive2, uniforms[:, 1])
+        assign_damage_batch(army2, alive2, sustain2, army_1_hits)
+        assign_damage_batch(army1, alive1, sustain1, army_2_hits)
+
+
+class VariantComparison:
+    """
+    Win probabilities of fleet variants against one opponent, run on common random numbers.
+
+    ``differences`` holds each variant's win probability minus the baseline's with the
+    standard error of the paired difference; ``independent_errors`` is the standard error
+    two independent plain simulate_fight runs of the same size would have had.
+    """
+    def __init__(self, names: list[str], outcomes: list[np.ndarray], baseline: int, antithetic: bool):
+        self.names = names
+        self.baseline = baseline
+        self.antithetic = antithetic
+        self.n_fights = outcomes[0].size
+        wins = [(outcome == 1).astype(float) for outcome in outcomes]
+        self.win_probability = [float(w.mean()) for w in wins]
+        self.draw_probability = [float(np.mean(outcome == 0)) for outcome in outcomes]
+        self.win_errors = [self._standard_error(w) for w in wins]
+
+        self.differences = {}
+        self.independent_errors = {}
+        for v, w in enumerate(wins):
+            if v == baseline:
+                continue
+            paired = w - wins[baseline]
+            self.differences[names[v]] = (float(paired.mean()), self._standard_error(paired))
+            self.independent_errors[names[v]] = float(np.sqrt(
+                sum(p * (1 - p) for p in (self.win_probability[v], self.win_probability[baseline])) / self.n_fights))
+
+    def _standard_error(self, values: np.ndarray) -> float:
+        # Antithetic trials come in (i, i + n/2) pairs, which are averaged before taking the spread
+        if self.antithetic:
+            half = values.size // 2
+            values = (values[:half] + values[half:]) / 2
+        return float(values.std(ddof=1) / np.sqrt(values.size)) if values.size > 1 else 0.0
+
+    def format(self) -> str:
+        lines = [f"    {name}: Win {p:.4f} ± {error:.4f}, Draw {d:.4f}"
+                 for name, p, error, d in zip(self.names, self.win_probability, self.win_errors, self.draw_probability)]
+        for name, (difference, error) in self.differences.items():
+            independent = self.independent_errors[name]
+            gain = (independent / error) ** 2 if error > 0 else float("inf")
+            lines.append(f"    {name} - {self.names[self.baseline]}: {difference:+.4f} ± {error:.4f}"
+                         f" (independent runs ± {independent:.4f}, {gain:.1f}x fewer trials)")
+        pairing = ", antithetic pairs" if self.antithetic else ""
+        return f"""
+    Variant Comparison ({self.n_fights} common-random-number fights per variant{pairing}):
+    --------------------------
+{chr(10).join(lines)}
+    """
+
+    def __str__(self):
+        return self.format()
+
+
+def compare_variants(variants: list[list[Ship]], opponent: list[Ship], n_fights=10000, seed=None,
+                     antithetic=False, baseline=0, names: list[str] = None,
+                     removal_policy="combat") -> VariantComparison:
+    """
+    Run every fleet variant (as army 1) against ``opponent`` on the same random numbers.
+
+    Rounds are resolved by inverse-CDF sampling of each side's hits, so the same
+    uniforms give similar fights for similar fleets and the paired difference in win
+    probability has far less noise than two independent simulate_fight runs. With
+    ``antithetic`` half of the trials reuse the other half's uniforms as 1 - u.
+    """
+    names = [f"Variant {v + 1}" for v in range(len(variants))] if names is None else list(names)
+    # Every variant restarts the same stream; a Generator seed contributes a child stream
+    seed_sequence = as_seed_sequence(seed)
+    n_pairs = n_fights // 2 if antithetic else n_fights
+    opponent_army = CrnArmy(opponent, removal_policy)
+    outcomes = [crn_outcomes(CrnArmy(variant, removal_policy), opponent_army, n_pairs, seed_sequence, antithetic)
+                for variant in variants]
+    return VariantComparison(names, outcomes, baseline, antithetic)
+
+
+if __name__ == "__main__":
+    fleet = [DefaultDreadnought(), DefaultCruiser(), DefaultCarrier(), DefaultFighter(), DefaultFighter()]
+    opponent = [DefaultDreadnought(), DefaultDreadnought(), DefaultCruiser(), DefaultDestroyer()]
+
+    print(compare_variants([fleet + [DefaultDreadnought()], fleet + [DefaultCruiser(), DefaultCruiser()]], opponent,
+                           names=["+1 Dreadnought", "+2 Cruisers"], n_fights=20000, seed=1, antithetic=True))
@@ -0,0 +1,210 @@
+from Ships import *  # assuming Ships module is present with the Default classes
+import numpy as np
+from functools import partial
+from fight_simulation import FightResult, SurvivorCodec, as_specs, removal_order, run_fight_tallies, scores_hits
+
+# Trials run together in one set of arrays; larger n_fights are processed batch by batch
+BATCH_SIZE = 100000
+
+
+class BatchArmy:
+    """
+    Column layout of one army for the batch engine.
+
+    Every ship gets one slot; the per-trial state is a boolean ``alive`` array of
+    shape (trials, slots) plus an integer count of unused sustain damage per trial.
+    """
+    def __init__(self, army: list[Ship], removal_policy="combat"):
+        army = as_specs(army)  # UnitGroups get one slot per unit
+        self.size = len(army)
+        self.codec = SurvivorCodec(army)
+        # slots x types matrix turning alive masks into per-type survivor counts
+        self.slot_types = np.zeros((self.size, len(self.codec.types)), dtype=np.int64)
+        self.slot_types[np.arange(self.size), self.codec.slot_type] = 1
+
+        combat = np.array([ship.combat for ship in army], dtype=np.int8)
+        hits = np.array([ship.hits for ship in army], dtype=int)
+
+        # One entry per combat die: the slot that rolls it and the value needed to hit
+        self.die_slot = np.repeat(np.arange(self.size), hits)
+        self.die_threshold = np.repeat(combat, hits)
+
+        # Order in which damage removes ships (see fight_simulation.REMOVAL_POLICIES)
+        self.removal_order = np.array(removal_order(army, removal_policy), dtype=int)
+        self.sustain = sum(1 for ship in army if ship.sustain_damage)
+
+        # Anti-fighter barrage removes fighters in removal order
+        self.fighter_order = np.array([i for i in self.removal_order if army[i].is_fighter], dtype=int)
+        self.barrage_threshold = np.array(
+            [ship.anti_fighter_combat for ship in army if ship.anti_fighter_barrage for _ in range(ship.anti_fighter_hits)],
+            dtype=np.int8,
+        )
+
+        # Space cannons fire a single die before combat and then leave the fight
+        self.cannon_mask = np.array([ship.is_space_cannon for ship in army], dtype=bool)
+        self.cannon_slot = np.flatnonzero(self.cannon_mask)
+        self.cannon_threshold = combat[self.cannon_slot]
+
+        # Slots whose combat dice can hit; None when every ship's can, so no trial can stall
+        hitters = [scores_hits(ship) for ship in army]
+        self.hitter_slot = None if all(hitters) else np.flatnonzero(hitters)
+
+    def cannot_hit(self, alive: np.ndarray) -> np.ndarray:
+        # Per trial, whether none of the surviving ships can score a combat hit
+        if self.hitter_slot is None:
+            return ~alive.any(axis=1)
+        return ~alive[:, self.hitter_slot].any(axis=1)
+
+    def new_state(self, n_trials: int):
+        alive = np.ones((n_trials, self.size), dtype=bool)
+        sustain = np.full(n_trials, self.sustain, dtype=int)
+        return alive, sustain
+
+
+def remove_ships(alive: np.ndarray, order: np.ndarray, hits: np.ndarray):
+    # Per trial, kill the first `hits` ships that are still alive when walking `order` (in place)
+    if order.size == 0:
+        return
+    ordered = alive[:, order]
+    ordered &= np.cumsum(ordered, axis=1) > hits[:, None]
+    alive[:, order] = ordered
+
+
+def assign_damage_batch(army: BatchArmy, alive: np.ndarray, sustain: np.ndarray, hits: np.ndarray):
+    # Same rule as fight_simulation.assign_damage: sustain damage first, then ships in removal-policy order
+    absorbed = np.minimum(hits, sustain)
+    sustain -= absorbed
+    remove_ships(alive, army.removal_order, hits - absorbed)
+
+
+def count_hits(rolls: np.ndarray, thresholds: np.ndarray, alive_dice: np.ndarray = None) -> np.ndarray:
+    successes = rolls >= thresholds
+    if alive_dice is not None:
+        successes &= alive_dice
+    return successes.sum(axis=1)
+
+
+def precombat_phase_batch(rng: np.random.Generator, army1: BatchArmy, army2: BatchArmy, state1, state2):
+    # Vectorised version of fight_simulation.precombat_phase, applied to every trial at once
+    alive1, sustain1 = state1
+    alive2, sustain2 = state2
+    n_trials = alive1.shape[0]
+
+    # Anti-fighter barrage
+    for shooter, target_army, target_alive in ((army1, army2, alive2), (army2, army1, alive1)):
+        if shooter.barrage_threshold.size and target_army.fighter_order.size:
+            rolls = rng.integers(1, 11, size=(n_trials, shooter.barrage_threshold.size), dtype=np.uint8)
+            remove_ships(target_alive, target_army.fighter_order, count_hits(rolls, shooter.barrage_threshold))
+
+    # Space cannon fire, army 1 first so destroyed cannons of army 2 do not shoot back
+    for shooter, shooter_alive, target_army, target_alive, target_sustain in (
+        (army1, alive1, army2, alive2, sustain2),
+        (army2, alive2, army1, alive1, sustain1),
+    ):
+        if shooter.cannon_slot.size:
+            rolls = rng.integers(1, 11, size=(n_trials, shooter.cannon_slot.size), dtype=np.uint8)
+            hits = count_hits(rolls, shooter.cannon_threshold, shooter_alive[:, shooter.cannon_slot])
+            assign_damage_batch(target_army, target_alive, target_sustain, hits)
+
+    # Remove space cannons from combat
+    alive1[:, army1.cannon_mask] = False
+    alive2[:, army2.cannon_mask] = False
+
+
+def record_winners(army: BatchArmy, alive: np.ndarray, sustain: np.ndarray, winners: np.ndarray,
+                   result: FightResult, label: str):
+    if not winners.any():
+        return
+    # Per-type survivor counts plus sustain left, one row per winning trial
+    states = np.column_stack([alive[winners].astype(np.int64) @ army.slot_types, sustain[winners]])
+
+    # Count identical states once, then encode only the distinct rows
+    rows, counts = np.unique(states, axis=0, return_counts=True)
+    for row, count in zip(rows, counts):
+        result.add_win(label, army.codec.encode(row[:-1], row[-1]), int(count))
+
+
+def simulate_fight_vectorized(armies: list[list[Ship]], n_fights=10000, workers=1, seed=None,
+                              removal_policy="combat") -> FightResult:
+    """
+    Batch engine for simulate_fight: all trials run together as (trials x ships) arrays.
+
+    Each round rolls the dice of both armies for every unfinished trial in a single
+    call, applies sustain damage and removals with array operations and then drops
+    the trials that have finished. Returns the same FightResult as simulate_fight;
+    ``workers``, ``seed`` and ``removal_policy`` behave as in simulate_fight.
+    """
+    tally_function = partial(vectorized_tallies, removal_policy=removal_policy)
+    return run_fight_tallies(tally_function, armies, n_fights, workers=workers, seed=seed)
+
+
+def vectorized_tallies(armies: list[list[Ship]], n_fights: int, seed=None, removal_policy="combat") -> FightResult:
+    # Same counts as fight_simulation.fight_tallies, computed BATCH_SIZE trials at a time
+    army1, army2 = BatchArmy(armies[0], removal_policy), BatchArmy(armies[1], removal_policy)
+    return batch_army_tallies(army1, army2, n_fights, seed)
+
+
+def batch_army_tallies(army1: BatchArmy, army2: BatchArmy, n_fights: int, seed=None) -> FightResult:
+    # vectorized_tallies for armies already laid out, so one BatchArmy can serve many matchups
+    rng = np.random.default_rng(seed)
+    result = FightResult([army1.codec, army2.codec], n_fights)
+
+    for start in range(0, n_fights, BATCH_SIZE):
+        run_batch(rng, army1, army2, min(BATCH_SIZE, n_fights - start), result)
+
+    return result
+
+
+def run_batch(rng: np.random.Generator, army1: BatchArmy, army2: BatchArmy, n_trials: int, result: FightResult):
+    alive1, sustain1 = army1.new_state(n_trials)
+    alive2, sustain2 = army2.new_state(n_trials)
+
+    precombat_phase_batch(rng, army1, army2, (alive1, sustain1), (alive2, sustain2))
+
+    n_dice1 = army1.die_slot.size
+    thresholds = np.concatenate([army1.die_threshold, army2.die_threshold])
+
+    rounds = 0
+    while True:
+        has_ships1 = alive1.any(axis=1)
+        has_ships2 = alive2.any(axis=1)
+        active = has_ships1 & has_ships2
+        # Fights where neither side can ever hit again end as draws
+        if army1.hitter_slot is not None and army2.hitter_slot is not None:
+            stalled = active & army1.cannot_hit(alive1) & army2.cannot_hit(alive2)
+            active &= ~stalled
+        else:
+            stalled = False
+
+        # Log finished trials, then keep only the ones still fighting
+        record_winners(army1, alive1, sustain1, has_ships1 & ~has_ships2, result, "Army 1")
+        record_winners(army2, alive2, sustain2, has_ships2 & ~has_ships1, result, "Army 2")
+        result.draws += int(np.sum((~has_ships1 & ~has_ships2) | stalled))
+        n_finished = int(active.size - active.sum())
+        if n_finished:
+            result.add_rounds(rounds, n_finished)
+
+        if not active.all():
+            alive1, sustain1 = alive1[active], sustain1[active]
+            alive2, sustain2 = alive2[active], sustain2[active]
+        n_active = alive1.shape[0]
+        if n_active == 0:
+            break
+
+        # One roll for every die of both armies in every active trial
+        rolls = rng.integers(1, 11, size=(n_active, thresholds.size), dtype=np.uint8)
+        alive_dice = np.concatenate([alive1[:, army1.die_slot], alive2[:, army2.die_slot]], axis=1)
+        successes = (rolls >= thresholds) & alive_dice
+        army_1_hits = successes[:, :n_dice1].sum(axis=1)
+        army_2_hits = successes[:, n_dice1:].sum(axis=1)
+
+        assign_damage_batch(army2, alive2, sustain2, army_1_hits)
+        assign_damage_batch(army1, alive1, sustain1, army_2_hits)
+        rounds += 1
+
+
+if __name__ == "__main__":
+    army_1 = [DefaultCruiser(), DefaultCruiser()]
+    army_2 = [DefaultCruiser()]
+
+    print(simulate_fight_vectorized([army_1, army_2], n_fights=10000))